@@ -0,0 +1,51 @@
+# Production server configuration: gunicorn -c gunicorn.conf.py src.main:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Threaded workers: requests mostly wait on Finnhub or SQLite, so each
+# process serves many requests concurrently while extra processes use the
+# remaining cores.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# An open quote stream (SSE) holds its thread while the client watches, so
+# streams get their own threads on top of those kept for ordinary requests,
+# and the app refuses streams past that many per worker.
+_request_threads = int(os.environ.get('GUNICORN_THREADS', 8))
+_stream_threads = int(os.environ.get('GUNICORN_STREAM_THREADS', 32))
+threads = _request_threads + _stream_threads
+os.environ.setdefault('QUOTE_STREAM_MAX_CONNECTIONS', str(_stream_threads))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers occasionally to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = 1000
+
+accesslog = '-'
+errorlog = '-'
+
+# Production defaults for the app
+os.environ.setdefault('FLASK_DEBUG', 'false')
+
+# Each worker process has its own provider token buckets, so split the
+# account-wide quotas and bursts between them before the workers import the
+# app. A bucket needs room for at least one call.
+_finnhub_rate_limit = float(os.environ.get('FINNHUB_RATE_LIMIT', 60))
+os.environ['FINNHUB_RATE_LIMIT'] = str(_finnhub_rate_limit / workers)
+_finnhub_burst = int(os.environ.get('FINNHUB_BURST', 10))
+os.environ['FINNHUB_BURST'] = str(max(1, _finnhub_burst // workers))
+_alpha_vantage_rate_limit = float(os.environ.get('ALPHA_VANTAGE_RATE_LIMIT', 5))
+os.environ['ALPHA_VANTAGE_RATE_LIMIT'] = str(_alpha_vantage_rate_limit / workers)
+_alpha_vantage_burst = int(os.environ.get('ALPHA_VANTAGE_BURST', 5))
+os.environ['ALPHA_VANTAGE_BURST'] = str(max(1, _alpha_vantage_burst // workers))
+
+
+def post_worker_init(worker):
+    # Background threads must be started after fork; the workers elect one of
+    # themselves to run prefetching and upstream symbol fetches (see src.main)
+    from src.main import start_background_services
+    start_background_services()
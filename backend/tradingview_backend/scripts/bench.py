@@ -0,0 +1,326 @@
+"""Load-test every /api route and report throughput and latency percentiles.
+
+Start the backend against the fake Finnhub (either in-process with
+FINNHUB_FAKE=true or via scripts/fake_finnhub_server.py) on a database that
+has been through `flask --app src.main init-db`, then run
+
+    python scripts/bench.py --base-url http://localhost:5000 --concurrency 16 \
+        --requests 500 --output results/$(date +%Y%m%d-%H%M%S).json
+
+Each route is driven on its own for --requests calls at --concurrency, so the
+numbers are comparable between runs. stocks.stream measures the time to
+the first quote event. Results are written as JSON; pass
+--baseline with an earlier result file to print the change per route.
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'NFLX']
+
+
+class Context:
+    """Ids created during setup plus pools handed from create to update/delete routes"""
+
+    def __init__(self):
+        self.user_id = None
+        self.watchlist_id = None
+        self.alert_id = None
+        self.pools = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def pool(self, name):
+        with self._lock:
+            return self.pools.setdefault(name, queue.Queue())
+
+    def next(self):
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+
+def _created(pool):
+    """Wrap a create call so the new id is queued for the update/delete routes"""
+    def record(ctx, response):
+        if response.status_code == 201:
+            item_id = response.json()['id']
+            ctx.pool(pool).put(item_id)
+            ctx.pool(pool + '_delete').put(item_id)
+    return record
+
+
+def _take(ctx, pool):
+    try:
+        return ctx.pool(pool).get_nowait()
+    except queue.Empty:
+        return 0  # Nothing left to work on; measures the 404 path instead
+
+
+def _read_first_event(response):
+    for line in response.iter_lines():
+        if line.startswith(b'data:'):
+            break
+    response.close()
+
+
+# name -> (method, path(ctx, i), json body(ctx, i) or None, after(ctx, response) or None, stream)
+# Ordered so that create routes run before the routes consuming their ids.
+ROUTES = [
+    ('users.list', 'GET', lambda c, i: '/api/users', None, None, False),
+    ('users.create', 'POST', lambda c, i: '/api/users',
+     lambda c, i: {'username': f"bench-{uuid.uuid4().hex[:12]}", 'email': f"{uuid.uuid4().hex[:12]}@bench.local"},
+     _created('users'), False),
+    ('users.get', 'GET', lambda c, i: f"/api/users/{c.user_id}", None, None, False),
+    ('users.update', 'PUT', lambda c, i: f"/api/users/{_take(c, 'users')}",
+     lambda c, i: {'email': f"{uuid.uuid4().hex[:12]}@bench.local"}, None, False),
+    ('users.delete', 'DELETE', lambda c, i: f"/api/users/{_take(c, 'users_delete')}", None, None, False),
+
+    ('stocks.quote', 'GET', lambda c, i: f"/api/stocks/quote/{SYMBOLS[i % len(SYMBOLS)]}", None, None, False),
+    ('stocks.quotes', 'GET', lambda c, i: f"/api/stocks/quotes?symbols={','.join(SYMBOLS)}", None, None, False),
+    ('stocks.stream', 'GET', lambda c, i: f"/api/stocks/stream?symbols={SYMBOLS[i % len(SYMBOLS)]}",
+     None, None, True),
+    # historical always covers the last year and intraday the last day
+    ('stocks.historical', 'GET', lambda c, i: f"/api/stocks/historical/{SYMBOLS[i % len(SYMBOLS)]}",
+     None, None, False),
+    ('stocks.historical.weekly', 'GET',
+     lambda c, i: f"/api/stocks/historical/{SYMBOLS[i % len(SYMBOLS)]}?interval=1w", None, None, False),
+    ('stocks.intraday', 'GET', lambda c, i: f"/api/stocks/intraday/{SYMBOLS[i % len(SYMBOLS)]}",
+     None, None, False),
+    ('stocks.search', 'GET', lambda c, i: f"/api/stocks/search/{SYMBOLS[i % len(SYMBOLS)][:2]}", None, None, False),
+    ('stocks.indicators', 'GET',
+     lambda c, i: f"/api/stocks/indicators/{SYMBOLS[i % len(SYMBOLS)]}?indicator=rsi", None, None, False),
+
+    ('watchlists.list', 'GET', lambda c, i: f"/api/watchlists?user_id={c.user_id}", None, None, False),
+    ('watchlists.snapshot', 'GET', lambda c, i: f"/api/watchlists/snapshot?user_id={c.user_id}", None, None, False),
+    ('watchlists.create', 'POST', lambda c, i: '/api/watchlists',
+     lambda c, i: {'user_id': c.user_id, 'name': f"bench-{c.next()}"}, _created('watchlists'), False),
+    ('watchlists.get', 'GET', lambda c, i: f"/api/watchlists/{c.watchlist_id}", None, None, False),
+    ('watchlists.update', 'PUT', lambda c, i: f"/api/watchlists/{_take(c, 'watchlists')}",
+     lambda c, i: {'name': f"bench-renamed-{i}"}, None, False),
+    ('watchlists.items.add', 'POST', lambda c, i: f"/api/watchlists/{c.watchlist_id}/items",
+     lambda c, i: {'stock_symbol': f"B{c.next()}"}, _created('items'), False),
+    ('watchlists.items.list', 'GET', lambda c, i: f"/api/watchlists/{c.watchlist_id}/items", None, None, False),
+    ('watchlists.items.delete', 'DELETE',
+     lambda c, i: f"/api/watchlists/{c.watchlist_id}/items/{_take(c, 'items_delete')}", None, None, False),
+    ('watchlists.delete', 'DELETE', lambda c, i: f"/api/watchlists/{_take(c, 'watchlists_delete')}",
+     None, None, False),
+
+    ('alerts.list', 'GET', lambda c, i: f"/api/alerts?user_id={c.user_id}", None, None, False),
+    ('alerts.create', 'POST', lambda c, i: '/api/alerts',
+     lambda c, i: {'user_id': c.user_id, 'stock_symbol': SYMBOLS[i % len(SYMBOLS)],
+                   'alert_type': 'price_above', 'target_value': 1e9},
+     _created('alerts'), False),
+    ('alerts.get', 'GET', lambda c, i: f"/api/alerts/{c.alert_id}", None, None, False),
+    ('alerts.update', 'PUT', lambda c, i: f"/api/alerts/{_take(c, 'alerts')}",
+     lambda c, i: {'target_value': 2e9}, None, False),
+    ('alerts.check', 'POST', lambda c, i: '/api/alerts/check',
+     lambda c, i: {'stock_prices': {symbol: 100.0 for symbol in SYMBOLS}}, None, False),
+    ('alerts.delete', 'DELETE', lambda c, i: f"/api/alerts/{_take(c, 'alerts_delete')}", None, None, False),
+
+    ('backtest', 'POST', lambda c, i: '/api/backtest',
+     lambda c, i: {'symbols': SYMBOLS, 'alert_type': 'price_above', 'target_value': 100 + i % 200}, None, False),
+    ('screener', 'POST', lambda c, i: '/api/screener',
+     lambda c, i: {'symbols': SYMBOLS, 'sort': '-return_1m', 'filters': {'bars': {'min': 20}}}, None, False),
+    ('correlation', 'POST', lambda c, i: '/api/correlation',
+     lambda c, i: {'watchlist_id': c.watchlist_id}, None, False),
+
+    ('bulk.candles.export', 'GET',
+     lambda c, i: f"/api/bulk/candles/export?symbols={','.join(SYMBOLS)}&resolution=D", None, None, False),
+    ('bulk.watchlists.export', 'GET', lambda c, i: f"/api/bulk/watchlists/export?user_id={c.user_id}",
+     None, None, False),
+    # A CSV body re-importing the setup watchlist's symbols (existing items are skipped)
+    ('bulk.watchlists.import', 'POST', lambda c, i: '/api/bulk/watchlists/import',
+     lambda c, i: 'user_id,watchlist,stock_symbol\n' + ''.join(f"{c.user_id},bench,{s}\n" for s in SYMBOLS),
+     None, False),
+]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def setup(base_url):
+    """Create the user, watchlist and alert the read routes operate on"""
+    ctx = Context()
+    tag = uuid.uuid4().hex[:8]
+    user = requests.post(f"{base_url}/api/users", json={'username': f"bench-{tag}", 'email': f"{tag}@bench.local"})
+    user.raise_for_status()
+    ctx.user_id = user.json()['id']
+
+    watchlist = requests.post(f"{base_url}/api/watchlists", json={'user_id': ctx.user_id, 'name': 'bench'})
+    watchlist.raise_for_status()
+    ctx.watchlist_id = watchlist.json()['id']
+    for symbol in SYMBOLS:
+        requests.post(f"{base_url}/api/watchlists/{ctx.watchlist_id}/items", json={'stock_symbol': symbol})
+
+    alert = requests.post(f"{base_url}/api/alerts", json={
+        'user_id': ctx.user_id, 'stock_symbol': 'AAPL', 'alert_type': 'price_above', 'target_value': 1e9
+    })
+    alert.raise_for_status()
+    ctx.alert_id = alert.json()['id']
+    return ctx
+
+
+def teardown(base_url, ctx):
+    requests.delete(f"{base_url}/api/alerts/{ctx.alert_id}")
+    requests.delete(f"{base_url}/api/watchlists/{ctx.watchlist_id}")
+    requests.delete(f"{base_url}/api/users/{ctx.user_id}")
+
+
+def run_route(base_url, ctx, route, total, concurrency, timeout):
+    name, method, path, body, after, stream = route
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def call(i):
+        nonlocal errors
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        payload = body(ctx, i) if body else None
+        # String bodies (bulk imports) are sent as CSV, anything else as JSON
+        if isinstance(payload, str):
+            send = {'data': payload.encode(), 'headers': {'Content-Type': 'text/csv'}}
+        else:
+            send = {'json': payload}
+        started = time.perf_counter()
+        try:
+            response = local.session.request(
+                method, base_url + path(ctx, i), timeout=timeout, stream=stream, **send
+            )
+            if stream:
+                _read_first_event(response)
+            else:
+                response.content
+        except requests.RequestException:
+            with lock:
+                errors += 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        if after:
+            after(ctx, response)
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'route': name,
+        'method': method,
+        'requests': total,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 4),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'max': _round(latencies[-1] if latencies else None)
+        },
+        'status_counts': {str(status): count for status, count in sorted(statuses.items())},
+        'transport_errors': errors
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Print per-route throughput and p95 change against an earlier run"""
+    previous = {row['route']: row for row in baseline['routes']}
+    print(f"{'route':32} {'rps':>10} {'Δrps':>8} {'p95 ms':>10} {'Δp95':>8}")
+    for row in results['routes']:
+        old = previous.get(row['route'])
+        rps, p95 = row['throughput_rps'], row['latency_ms']['p95']
+        d_rps = d_p95 = ''
+        if old and old['throughput_rps'] and rps is not None:
+            d_rps = f"{(rps / old['throughput_rps'] - 1) * 100:+.0f}%"
+        if old and old['latency_ms']['p95'] and p95 is not None:
+            d_p95 = f"{(p95 / old['latency_ms']['p95'] - 1) * 100:+.0f}%"
+        print(f"{row['route']:32} {rps or 0:>10.1f} {d_rps:>8} {p95 or 0:>10.2f} {d_p95:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /api routes')
+    parser.add_argument('--base-url', default=os.environ.get('BENCH_BASE_URL', 'http://localhost:5000'))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests per route first')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--only', action='append', help='run routes whose name starts with this (repeatable)')
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON result to compare against')
+    options = parser.parse_args()
+
+    routes = ROUTES
+    if options.only:
+        routes = [route for route in ROUTES if route[0].startswith(tuple(options.only))]
+
+    ctx = setup(options.base_url)
+    rows = []
+    try:
+        for route in routes:
+            if options.warmup and route[1] == 'GET':
+                run_route(options.base_url, ctx, route, options.warmup, options.concurrency, options.timeout)
+            rows.append(run_route(
+                options.base_url, ctx, route, options.requests, options.concurrency, options.timeout
+            ))
+    finally:
+        teardown(options.base_url, ctx)
+
+    results = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'base_url': options.base_url,
+        'concurrency': options.concurrency,
+        'requests_per_route': options.requests,
+        'routes': rows
+    }
+
+    if options.output:
+        os.makedirs(os.path.dirname(os.path.abspath(options.output)), exist_ok=True)
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Local stand-in for the Finnhub REST API.
+
+Serves /quote, /stock/candle, /search and /stock/symbol under /api/v1 from
+synthetic data (src.services.fake_finnhub) or from a recorded cassette, with
+optional added latency and injected 429s. Point the backend at it with
+
+    FINNHUB_BASE_URL=http://localhost:9100/api/v1 python src/main.py
+
+It also answers Alpha Vantage calls at /query (synthetic data only), so two
+instances with different --latency can stand in for a slow primary and a
+fast fallback provider:
+
+    ALPHA_VANTAGE_API_KEY=demo ALPHA_VANTAGE_BASE_URL=http://localhost:9101/query
+
+Modes:
+    synthetic (default)      generated data only
+    --replay cassette.jsonl  recorded responses, synthetic for anything missing
+                             (or 404 with --strict); candles are matched by
+                             symbol and resolution and cut to the asked window
+    --record cassette.jsonl  proxy to the real API (needs FINNHUB_API_KEY)
+                             and append every response to the cassette
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import fake_alpha_vantage, fake_finnhub
+
+API_PREFIX = '/api/v1'
+ALPHA_VANTAGE_PATH = '/query'
+REAL_BASE_URL = 'https://finnhub.io/api/v1'
+
+
+# Never part of a cassette key: the token is a secret, and candle windows
+# move with the clock, so a recording would never match a later run
+UNKEYED_PARAMS = ('token', 'from', 'to')
+CANDLE_FIELDS = ('c', 'h', 'l', 'o', 't', 'v')
+
+
+def cassette_key(path, params):
+    """Stable key for a call; the token and candle window never take part in matching"""
+    query = '&'.join(f"{k}={v}" for k, v in sorted(params.items()) if k not in UNKEYED_PARAMS)
+    return f"{path}?{query}"
+
+
+def clip_candles(body, params):
+    """Cut a recorded /stock/candle body down to the bars inside the requested from/to"""
+    if not isinstance(body, dict) or body.get('s') != 'ok':
+        return body
+    start = int(params.get('from', 0))
+    end = int(params.get('to', sys.maxsize))
+    keep = [i for i, t in enumerate(body['t']) if start <= t <= end]
+    if not keep:
+        return {'s': 'no_data'}
+    clipped = {field: [body[field][i] for i in keep] for field in CANDLE_FIELDS if field in body}
+    clipped['s'] = 'ok'
+    return clipped
+
+
+class Cassette:
+    """Recorded responses stored one JSON object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.responses = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # Re-key older recordings made before from/to left the key
+                        path, _, query = entry['key'].partition('?')
+                        key = cassette_key(path, dict(parse_qsl(query)))
+                        self.responses[key] = (entry['status'], entry['body'])
+
+    def get(self, key):
+        return self.responses.get(key)
+
+    def record(self, key, status, body):
+        with self._lock:
+            self.responses[key] = (status, body)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'key': key, 'status': status, 'body': body}) + '\n')
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+def make_handler(options, cassette, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/_stats':
+                return self._send(200, stats.counts)
+            if url.path == ALPHA_VANTAGE_PATH:
+                path = url.path
+            elif url.path.startswith(API_PREFIX):
+                path = url.path[len(API_PREFIX):]
+            else:
+                return self._send(404, {'error': 'Unknown endpoint'})
+
+            params = dict(parse_qsl(url.query))
+
+            if options.latency or options.jitter:
+                time.sleep(options.latency + random.uniform(0, options.jitter))
+
+            if options.error_rate and random.random() < options.error_rate:
+                stats.add('injected_429')
+                return self._send(429, {'error': 'API limit reached'}, {'Retry-After': str(options.retry_after)})
+
+            status, body = self._resolve(path, params)
+            stats.add(f"{status} {path}")
+            self._send(status, body)
+
+        def _resolve(self, path, params):
+            if path == ALPHA_VANTAGE_PATH:
+                return fake_alpha_vantage.handle(params)
+            key = cassette_key(path, params)
+            if options.record:
+                params['token'] = os.environ.get('FINNHUB_API_KEY', '')
+                response = requests.get(f"{options.upstream}{path}", params=params, timeout=10)
+                body = response.json() if response.content else None
+                if response.status_code == 200:
+                    cassette.record(key, response.status_code, body)
+                return response.status_code, body
+            if cassette is not None:
+                recorded = cassette.get(key)
+                if recorded is not None:
+                    status, body = recorded
+                    if path == '/stock/candle':
+                        body = clip_candles(body, params)
+                    return status, body
+                if options.strict:
+                    return 404, {'error': f'No recording for {key}'}
+            return fake_finnhub.handle(path, params)
+
+        def _send(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            if options.verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Finnhub API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with injected 429s')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--record', metavar='CASSETTE', help='proxy to the real API and record responses')
+    mode.add_argument('--replay', metavar='CASSETTE', help='serve recorded responses')
+    parser.add_argument('--strict', action='store_true', help='404 instead of synthetic data for unrecorded calls')
+    parser.add_argument('--upstream', default=REAL_BASE_URL, help='API used in --record mode')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    options = parser.parse_args()
+
+    cassette = None
+    if options.record or options.replay:
+        cassette = Cassette(options.record or options.replay)
+
+    server = ThreadingHTTPServer((options.host, options.port), make_handler(options, cassette, Stats()))
+    server.daemon_threads = True
+    print(f"Fake Finnhub listening on http://{options.host}:{options.port}{API_PREFIX}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -8,13 +9,22 @@ load_dotenv()
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
+from sqlalchemy import event
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.stock import stock_bp
+from src.routes.stock import stock_bp, fetch_symbol_universe, symbol_index
 from src.routes.watchlist import watchlist_bp
 from src.routes.alert import alert_bp
+from src.routes.backtest import backtest_bp
+from src.routes.analytics import analytics_bp
+from src.routes.bulk import bulk_bp
+from src.services import metrics
+from src.services.leader import LeaderLock
+from src.services.prefetch import PrefetchScheduler
+from src.services.static_files import StaticManifest, serve_static
+from src.services.symbol_index import SymbolRefresher
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -26,42 +36,128 @@ app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(stock_bp, url_prefix='/api')
 app.register_blueprint(watchlist_bp, url_prefix='/api')
 app.register_blueprint(alert_bp, url_prefix='/api')
+app.register_blueprint(backtest_bp, url_prefix='/api')
+app.register_blueprint(analytics_bp, url_prefix='/api')
+app.register_blueprint(bulk_bp, url_prefix='/api')
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# SQLite tuning for many threads/processes sharing one database file
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))  # seconds
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is safe with WAL
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        # Connections are pooled and handed between request threads
+        'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT, 'check_same_thread': False},
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': 30
+    }
+
 # Import all models to ensure they are registered with SQLAlchemy
-from src.models.stock import Watchlist, WatchlistItem, Alert
+from src.models.stock import Watchlist, WatchlistItem, Alert, Candle, CandleRange, ChangeLog
 
 db.init_app(app)
-with app.app_context():
-    db.create_all()
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside a writer; busy_timeout waits out write locks"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache per connection
+    cursor.close()
+
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+
+def init_db():
+    """Create missing tables and indexes; run once per deploy, not per import"""
+    with app.app_context():
+        db.create_all()
+        # create_all() skips tables that already exist, so add any new indexes to them
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+
+# Request timing, DB query accounting and /metrics; ?profile=1 returns a
+# cProfile breakdown of the request, but only with PROFILING_ENABLED=true set
+# explicitly, since it exposes code paths and timings to any caller
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+metrics.init_app(app, db, profiling_enabled=PROFILING_ENABLED)
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables and indexes"""
+    init_db()
+    print('Database initialized')
 
+# Background cache warming for watched/alerted symbols (opt-in)
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'false').lower() == 'true'
+PREFETCH_INTERVAL = float(os.environ.get('PREFETCH_INTERVAL', 60))
+PREFETCH_MAX_CALLS = int(os.environ.get('PREFETCH_MAX_CALLS', 30))
+# Share of each cycle's calls kept for candle backfill, even with many watched symbols
+PREFETCH_CANDLE_SHARE = float(os.environ.get('PREFETCH_CANDLE_SHARE', 0.25))
 
-@app.route('/')
-def index():
-    return send_from_directory('static', 'index.html')
+prefetch_scheduler = PrefetchScheduler(
+    app, interval=PREFETCH_INTERVAL, max_calls=PREFETCH_MAX_CALLS, candle_share=PREFETCH_CANDLE_SHARE
+)
 
+# Periodic reload of the full symbol universe for search (seconds, 0 = bundled list only)
+SYMBOL_REFRESH_INTERVAL = float(os.environ.get('SYMBOL_REFRESH_INTERVAL', 0))
+# The leader fetches the universe into this file and every worker loads it from there
+SYMBOL_UNIVERSE_FILE = os.environ.get(
+    'SYMBOL_UNIVERSE_FILE', os.path.join(tempfile.gettempdir(), 'tradingview-symbols.csv')
+)
+symbol_refresher = SymbolRefresher(
+    symbol_index, fetch_symbol_universe, SYMBOL_REFRESH_INTERVAL, shared_file=SYMBOL_UNIVERSE_FILE
+)
+
+# Held by the one process per host that runs prefetching and upstream symbol fetches
+BACKGROUND_LOCK_FILE = os.environ.get(
+    'BACKGROUND_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'tradingview-background.lock')
+)
+background_leader = LeaderLock(BACKGROUND_LOCK_FILE)
+
+def start_leader_services():
+    """Start the background work that must run once, not once per worker"""
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+    if SYMBOL_REFRESH_INTERVAL > 0:
+        symbol_refresher.lead()
+
+def start_background_services():
+    """Start background threads; called once in each serving process.
+
+    Every process reloads the shared symbol universe, but only the elected
+    leader refreshes quotes, candles and alerts or calls upstream for symbols.
+    """
+    if SYMBOL_REFRESH_INTERVAL > 0:
+        symbol_refresher.start()
+    background_leader.run_when_leader(start_leader_services)
+
+# The built frontend, loaded into memory (with compressed variants) once at startup
+static_manifest = StaticManifest(app.static_folder)
+
+@app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
-def static_files(path):
-    return send_from_directory('static', path)
+def serve(path):
+    return serve_static(static_manifest, path)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    debug = os.environ.get('FLASK_DEBUG', 'true').lower() == 'true'
+    init_db()
+    # The debug reloader's watcher process never serves requests, so skip it there
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=debug)
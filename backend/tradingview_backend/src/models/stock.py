@@ -2,6 +2,11 @@ from flask_sqlalchemy import SQLAlchemy
 from src.models.user import db
 
 class Watchlist(db.Model):
+    __table_args__ = (
+        # Listing a user's watchlists in id (cursor) order
+        db.Index('ix_watchlist_user_id_id', 'user_id', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -20,6 +25,13 @@ class Watchlist(db.Model):
         }
 
 class WatchlistItem(db.Model):
+    __table_args__ = (
+        # Loading a watchlist's items and the duplicate-symbol check
+        db.Index('ix_watchlist_item_watchlist_id_symbol', 'watchlist_id', 'stock_symbol'),
+        # Grouping watchers by symbol for prefetching
+        db.Index('ix_watchlist_item_stock_symbol', 'stock_symbol'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     watchlist_id = db.Column(db.Integer, db.ForeignKey('watchlist.id'), nullable=False)
     stock_symbol = db.Column(db.String(10), nullable=False)
@@ -34,6 +46,14 @@ class WatchlistItem(db.Model):
         }
 
 class Alert(db.Model):
+    __table_args__ = (
+        # Listing a user's alerts in id (cursor) order, optionally by status
+        db.Index('ix_alert_user_id_id', 'user_id', 'id'),
+        db.Index('ix_alert_user_id_status_id', 'user_id', 'status', 'id'),
+        # Loading active alerts, grouped by symbol
+        db.Index('ix_alert_status_stock_symbol', 'status', 'stock_symbol'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     stock_symbol = db.Column(db.String(10), nullable=False)
@@ -55,3 +75,57 @@ class Alert(db.Model):
             'triggered_at': self.triggered_at.isoformat() if self.triggered_at else None
         }
 
+
+class Candle(db.Model):
+    """A single OHLCV bar cached locally from the market data provider"""
+    symbol = db.Column(db.String(10), primary_key=True)
+    resolution = db.Column(db.String(5), primary_key=True)
+    timestamp = db.Column(db.Integer, primary_key=True)  # UNIX seconds, bar open
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.Float, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'resolution': self.resolution,
+            'timestamp': self.timestamp,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
+
+class CandleRange(db.Model):
+    """The contiguous time range already held in Candle for a symbol/resolution"""
+    symbol = db.Column(db.String(10), primary_key=True)
+    resolution = db.Column(db.String(5), primary_key=True)
+    start_ts = db.Column(db.Integer, nullable=False)
+    end_ts = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'resolution': self.resolution,
+            'start_ts': self.start_ts,
+            'end_ts': self.end_ts,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ChangeLog(db.Model):
+    """One row per change to a user's watchlists or alerts; the id doubles as the version"""
+    __table_args__ = (
+        # Latest version and changes since a version for one user's collection
+        db.Index('ix_change_log_user_id_entity_id', 'user_id', 'entity', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'watchlist', 'alert'
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert', 'delete'
+    changed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -1,21 +1,120 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, or_, select, update
 from src.models.stock import Alert, db
+from src.services import changes
+from src.services.alert_index import AlertIndex
+from src.services.pagination import keyset_page, page_response, parse_page_args
 from datetime import datetime
+import os
 
 alert_bp = Blueprint('alert', __name__)
 
+# Seconds before the in-memory index is rebuilt to pick up other workers' changes
+ALERT_INDEX_MAX_AGE = float(os.environ.get("ALERT_INDEX_MAX_AGE", 300))
+
+# Keep IN (...) lists under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+def load_active_alerts():
+    """Return (id, symbol, alert_type, target_value) rows for every active alert"""
+    return db.session.execute(
+        select(Alert.id, Alert.stock_symbol, Alert.alert_type, Alert.target_value)
+        .where(Alert.status == 'active')
+    ).all()
+
+alert_index = AlertIndex(load_active_alerts, max_age=ALERT_INDEX_MAX_AGE)
+
+def crossed_at(price):
+    """SQL condition for an alert whose current threshold is crossed by price"""
+    return or_(
+        and_(Alert.alert_type == 'price_above', Alert.target_value <= price),
+        and_(Alert.alert_type == 'price_below', Alert.target_value >= price)
+    )
+
+def mark_triggered(crossed, prices):
+    """Mark {symbol: [alert ids]} triggered with bulk UPDATEs and return the ones that changed"""
+    if not crossed:
+        return []
+    
+    triggered_at = datetime.utcnow()
+    chunks = [
+        (symbol, ids[i:i + ID_CHUNK_SIZE])
+        for symbol, ids in crossed.items()
+        for i in range(0, len(ids), ID_CHUNK_SIZE)
+    ]
+    
+    try:
+        for symbol, chunk in chunks:
+            # The index may be stale (other workers edit alerts too), so the
+            # crossing is checked again against the row's current threshold
+            db.session.execute(
+                update(Alert)
+                .where(
+                    Alert.id.in_(chunk),
+                    Alert.status == 'active',
+                    Alert.stock_symbol == symbol,
+                    crossed_at(prices[symbol])
+                )
+                .values(status='triggered', triggered_at=triggered_at)
+                .execution_options(synchronize_session=False)
+            )
+            # Log the flips in the same transaction so change feeds never miss one
+            for alert_id, user_id in db.session.execute(
+                select(Alert.id, Alert.user_id)
+                .where(Alert.id.in_(chunk), Alert.triggered_at == triggered_at)
+            ):
+                changes.record(user_id, changes.ALERTS, alert_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        alert_index.invalidate()
+        raise
+    
+    # Only report rows this call flipped, not ones another worker got to first
+    triggered = []
+    for _, chunk in chunks:
+        triggered.extend(Alert.query.filter(
+            Alert.id.in_(chunk), Alert.triggered_at == triggered_at
+        ).all())
+    if len(triggered) < sum(len(ids) for ids in crossed.values()):
+        # Some popped entries were stale; reload rather than lose the live ones
+        alert_index.invalidate()
+    return triggered
+
+def evaluate_prices(stock_prices):
+    """Trigger every active alert crossed by {symbol: price}; returns the Alerts"""
+    prices = {symbol.upper(): float(price) for symbol, price in stock_prices.items()}
+    return mark_triggered(alert_index.pop_crossed(prices), prices)
+
 @alert_bp.route('/alerts', methods=['GET'])
 def get_alerts():
-    """Get all alerts for a user"""
-    user_id = request.args.get('user_id', 1)  # Default to user 1 for now
+    """Get all alerts for a user, or only the changes after ?since_version="""
+    user_id = request.args.get('user_id', 1, type=int)  # Default to user 1 for now
     status = request.args.get('status')  # Optional filter by status
+    since_version = request.args.get('since_version', type=int)
+    limit, cursor, error = parse_page_args()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Answer repeat polls from the version alone, before loading any rows
+    version = changes.current_version(user_id, changes.ALERTS)
+    etag = changes.collection_etag(user_id, changes.ALERTS, version)
+    unchanged = changes.not_modified(etag, version)
+    if unchanged:
+        return unchanged
+    
+    if since_version is not None:
+        # The feed covers every status; a status change arrives as an upsert
+        response = changes.feed_response(user_id, changes.ALERTS, Alert, since_version)
+        return changes.versioned(response, etag, version)
     
     query = Alert.query.filter_by(user_id=user_id)
     if status:
         query = query.filter_by(status=status)
     
-    alerts = query.all()
-    return jsonify([alert.to_dict() for alert in alerts])
+    alerts, next_cursor = keyset_page(query, Alert.id, limit, cursor)
+    response = page_response([alert.to_dict() for alert in alerts], next_cursor)
+    return changes.versioned(response, etag, version)
 
 @alert_bp.route('/alerts', methods=['POST'])
 def create_alert():
@@ -44,7 +143,10 @@ def create_alert():
     )
     
     db.session.add(alert)
+    db.session.flush()
+    changes.record(user_id, changes.ALERTS, alert.id)
     db.session.commit()
+    alert_index.sync(alert)
     
     return jsonify(alert.to_dict()), 201
 
@@ -78,7 +180,9 @@ def update_alert(alert_id):
         if data['status'] == 'triggered' and alert.status != 'triggered':
             alert.triggered_at = datetime.utcnow()
     
+    changes.record(alert.user_id, changes.ALERTS, alert.id)
     db.session.commit()
+    alert_index.sync(alert)
     return jsonify(alert.to_dict())
 
 @alert_bp.route('/alerts/<int:alert_id>', methods=['DELETE'])
@@ -86,7 +190,9 @@ def delete_alert(alert_id):
     """Delete an alert"""
     alert = Alert.query.get_or_404(alert_id)
     db.session.delete(alert)
+    changes.record(alert.user_id, changes.ALERTS, alert.id, op='delete')
     db.session.commit()
+    alert_index.remove(alert_id)
     
     return '', 204
 
@@ -96,31 +202,9 @@ def check_alerts():
     data = request.json
     stock_prices = data.get('stock_prices', {})  # Dict of symbol: price
     
-    triggered_alerts = []
-    
-    # Get all active alerts
-    active_alerts = Alert.query.filter_by(status='active').all()
-    
-    for alert in active_alerts:
-        symbol = alert.stock_symbol
-        if symbol in stock_prices:
-            current_price = float(stock_prices[symbol])
-            
-            should_trigger = False
-            if alert.alert_type == 'price_above' and current_price >= alert.target_value:
-                should_trigger = True
-            elif alert.alert_type == 'price_below' and current_price <= alert.target_value:
-                should_trigger = True
-            
-            if should_trigger:
-                alert.status = 'triggered'
-                alert.triggered_at = datetime.utcnow()
-                triggered_alerts.append(alert.to_dict())
-    
-    db.session.commit()
+    triggered_alerts = [alert.to_dict() for alert in evaluate_prices(stock_prices)]
     
     return jsonify({
         'triggered_alerts': triggered_alerts,
         'count': len(triggered_alerts)
     })
-
@@ -0,0 +1,143 @@
+from flask import Blueprint, jsonify, request
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from src.models.stock import Watchlist, db
+from src.routes.stock import parse_symbols, upstream_error_response
+from src.services import candle_store, market_data, metrics
+from src.services.screener import METRICS, Universe, UniverseCache
+
+analytics_bp = Blueprint('analytics', __name__)
+
+# Universe limits
+SCREENER_MAX_SYMBOLS = int(os.environ.get("SCREENER_MAX_SYMBOLS", 2000))
+SCREENER_MAX_BACKFILL = int(os.environ.get("SCREENER_MAX_BACKFILL", 10))
+# Larger matrices are too big to be useful as JSON
+CORRELATION_MAX_SYMBOLS = int(os.environ.get("CORRELATION_MAX_SYMBOLS", 200))
+
+# Built universes (aligned candles plus metrics), per symbol set, window and day
+SCREENER_CACHE_TTL = float(os.environ.get("SCREENER_CACHE_TTL", 300))
+SCREENER_CACHE_MAX_SIZE = int(os.environ.get("SCREENER_CACHE_MAX_SIZE", 32))
+universe_cache = UniverseCache(ttl=SCREENER_CACHE_TTL, max_size=SCREENER_CACHE_MAX_SIZE)
+metrics.register_cache('screener', universe_cache)
+
+def read_universe_args(data):
+    """Resolve symbols (or a watchlist_id) and days from a JSON body into (symbols, days, error response)"""
+    if data.get('watchlist_id') is not None:
+        watchlist = db.session.get(Watchlist, data['watchlist_id'])
+        if watchlist is None:
+            return None, None, (jsonify({'error': 'Watchlist not found'}), 404)
+        symbols = parse_symbols(','.join(item.stock_symbol for item in watchlist.items))
+    else:
+        symbols = data.get('symbols', [])
+        if isinstance(symbols, str):
+            symbols = parse_symbols(symbols)
+        else:
+            symbols = parse_symbols(','.join(str(symbol) for symbol in symbols))
+    if not symbols:
+        return None, None, (jsonify({'error': 'symbols or watchlist_id is required'}), 400)
+    if len(symbols) > SCREENER_MAX_SYMBOLS:
+        return None, None, (jsonify({'error': f'At most {SCREENER_MAX_SYMBOLS} symbols per request'}), 400)
+
+    try:
+        days = int(data.get('days', 365))
+    except (TypeError, ValueError):
+        days = 0
+    if days < 1:
+        return None, None, (jsonify({'error': 'days must be a positive number'}), 400)
+    return symbols, days, None
+
+def get_universe(symbols, days, backfill=True):
+    """Return (universe, cached) for daily candles over the last days, building it on a miss"""
+    today = datetime.now(timezone.utc).date()
+    # Order does not change the data, so the sorted set is the key
+    symbols = sorted(symbols)
+    key = (tuple(symbols), days, today.isoformat())
+
+    def build():
+        to_timestamp = int(datetime.now().timestamp())
+        from_timestamp = int((datetime.now() - timedelta(days=days)).timestamp())
+        series = candle_store.load_candle_arrays(
+            symbols, 'D', from_timestamp, to_timestamp,
+            max_backfill=SCREENER_MAX_BACKFILL if backfill else 0
+        )
+        return Universe(symbols, series)
+
+    return universe_cache.get(key, build)
+
+@analytics_bp.route('/screener', methods=['POST'])
+def screen():
+    """Screen symbols by return, volatility, volume spike and distance from the 52-week high"""
+    data = request.json or {}
+    started = time.perf_counter()
+
+    symbols, days, error = read_universe_args(data)
+    if error:
+        return error
+
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        return jsonify({'error': 'filters must be an object of {metric: {"min": x, "max": y}}'}), 400
+    for name, bounds in filters.items():
+        if name not in METRICS:
+            return jsonify({'error': f"filter metric must be one of {', '.join(METRICS)}"}), 400
+        if not isinstance(bounds, dict) or any(
+            not isinstance(bounds.get(k), (int, float, type(None))) for k in ('min', 'max')
+        ):
+            return jsonify({'error': f'{name} filter must be {{"min": number, "max": number}}'}), 400
+
+    sort = data.get('sort')
+    if sort is not None and (not isinstance(sort, str) or sort.lstrip('-') not in METRICS):
+        return jsonify({'error': f"sort must be one of {', '.join(METRICS)}, optionally prefixed with -"}), 400
+    limit = data.get('limit')
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+
+    try:
+        universe, cached = get_universe(symbols, days, data.get('backfill', True))
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
+
+    results = universe.screen(filters, sort, limit)
+
+    return jsonify({
+        'as_of': int(universe.t[-1]) if len(universe.t) else None,
+        'count': len(results),
+        'results': results,
+        'missing': universe.missing,
+        'cached': cached,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
+@analytics_bp.route('/correlation', methods=['POST'])
+def correlation():
+    """Correlation matrix of daily log returns across symbols"""
+    data = request.json or {}
+    started = time.perf_counter()
+
+    symbols, days, error = read_universe_args(data)
+    if error:
+        return error
+    if len(symbols) > CORRELATION_MAX_SYMBOLS:
+        return jsonify({'error': f'At most {CORRELATION_MAX_SYMBOLS} symbols per correlation matrix'}), 400
+
+    min_overlap = data.get('min_overlap', 20)
+    if not isinstance(min_overlap, int) or min_overlap < 2:
+        return jsonify({'error': 'min_overlap must be an integer of at least 2'}), 400
+
+    try:
+        universe, cached = get_universe(symbols, days, data.get('backfill', True))
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
+
+    matrix = universe.correlation(min_overlap)
+
+    return jsonify({
+        'as_of': int(universe.t[-1]) if len(universe.t) else None,
+        'symbols': universe.symbols,
+        # NaN (too little shared history) is not valid JSON, so send null
+        'matrix': [[None if v != v else round(v, 6) for v in row] for row in matrix.tolist()],
+        'missing': universe.missing,
+        'cached': cached,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
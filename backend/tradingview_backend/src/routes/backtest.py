@@ -0,0 +1,80 @@
+from flask import Blueprint, jsonify, request
+import os
+import time
+from datetime import datetime, timedelta
+from src.routes.stock import parse_symbols, upstream_error_response
+from src.services import backtest, candle_store, market_data
+from src.services.backtest import RuleError
+
+backtest_bp = Blueprint('backtest', __name__)
+
+# Sweep limits
+BACKTEST_MAX_SYMBOLS = int(os.environ.get("BACKTEST_MAX_SYMBOLS", 1000))
+# Symbols without stored candles that one request may fetch from upstream
+BACKTEST_MAX_BACKFILL = int(os.environ.get("BACKTEST_MAX_BACKFILL", 10))
+
+@backtest_bp.route('/backtest', methods=['POST'])
+def run_backtest():
+    """Backtest an alert-style or composed rule over stored candles for many symbols"""
+    data = request.json or {}
+
+    symbols = data.get('symbols', [])
+    if isinstance(symbols, str):
+        symbols = parse_symbols(symbols)
+    else:
+        symbols = parse_symbols(','.join(str(symbol) for symbol in symbols))
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    if len(symbols) > BACKTEST_MAX_SYMBOLS:
+        return jsonify({'error': f'At most {BACKTEST_MAX_SYMBOLS} symbols per backtest'}), 400
+
+    # Accept an Alert's own fields as the rule: {"alert_type": ..., "target_value": ...}
+    rule_spec = data.get('rule')
+    if rule_spec is None and 'alert_type' in data:
+        rule_spec = {'type': data['alert_type'], 'value': data.get('target_value')}
+
+    try:
+        rule = backtest.compile_rule(rule_spec)
+        exit_rule = backtest.compile_rule(data['exit']) if data.get('exit') is not None else None
+        horizon = int(data.get('horizon', 5))
+        fee = float(data.get('fee', 0.0))
+        days = int(data.get('days', 365))
+    except (RuleError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if horizon < 1 or days < 1 or not 0 <= fee < 1:
+        return jsonify({'error': 'horizon and days must be positive and fee between 0 and 1'}), 400
+
+    resolution = data.get('resolution', 'D')
+    if resolution not in backtest.PERIODS_PER_YEAR:
+        return jsonify({'error': f"resolution must be one of {', '.join(backtest.PERIODS_PER_YEAR)}"}), 400
+
+    to_timestamp = int(datetime.now().timestamp())
+    from_timestamp = int((datetime.now() - timedelta(days=days)).timestamp())
+    started = time.perf_counter()
+
+    try:
+        series = candle_store.load_candle_arrays(
+            symbols, resolution, from_timestamp, to_timestamp,
+            max_backfill=BACKTEST_MAX_BACKFILL if data.get('backfill', True) else 0
+        )
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
+    missing = [symbol for symbol in symbols if symbol not in series]
+
+    results = backtest.run_sweep(
+        series, rule, exit_rule,
+        resolution=resolution,
+        horizon=horizon,
+        fee=fee,
+        include_triggers=data.get('include_triggers', True)
+    )
+
+    return jsonify({
+        'resolution': resolution,
+        'from': from_timestamp,
+        'to': to_timestamp,
+        'summary': backtest.summarize(results),
+        'results': results,
+        'missing': missing,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
@@ -0,0 +1,142 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import io
+import sys
+import time
+import click
+from src.routes.alert import alert_index
+from src.routes.stock import parse_symbols
+from src.services import bulk
+from src.services.bulk import FORMATS, KINDS, BulkImportError
+
+bulk_bp = Blueprint('bulk', __name__)
+
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+class RequestBody(io.RawIOBase):
+    """Raw-IO view of a WSGI input stream, which need not implement the io interface (gunicorn's doesn't)"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def export_filters(kind, args):
+    """Keyword filters for a kind's export function from query args or CLI options"""
+    if kind == 'candles':
+        return {
+            'symbols': parse_symbols(args.get('symbols') or ''),
+            'resolution': args.get('resolution'),
+            'from_ts': args.get('from'),
+            'to_ts': args.get('to')
+        }
+    filters = {'user_id': args.get('user_id')}
+    if kind == 'alerts':
+        filters['status'] = args.get('status')
+    return filters
+
+def run_import(kind, lines, fmt):
+    """Import text lines of one kind and return its counts"""
+    result = KINDS[kind][2](bulk.read_rows(lines, fmt))
+    if kind == 'alerts':
+        # Pick the new alerts up in this process's evaluation index
+        alert_index.invalidate()
+    return result
+
+def request_format():
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'ndjson' if request.mimetype in ('application/x-ndjson', 'application/ndjson') else 'csv'
+    return fmt
+
+@bulk_bp.route('/bulk/<kind>/export', methods=['GET'])
+def export_rows(kind):
+    """Stream every row of a kind as CSV or NDJSON"""
+    fmt = request.args.get('format', 'csv')
+    if kind not in KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(KINDS)}"}), 404
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+
+    args = {key: request.args.get(key) for key in ('symbols', 'resolution', 'status')}
+    args.update({key: request.args.get(key, type=int) for key in ('from', 'to', 'user_id')})
+    columns, export, _ = KINDS[kind]
+    chunks = export(**export_filters(kind, args))
+
+    # The generator keeps the request (and its DB session) open while it streams
+    response = Response(stream_with_context(bulk.encode(chunks, columns, fmt)), mimetype=MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={kind}.{fmt}'
+    return response
+
+@bulk_bp.route('/bulk/<kind>/import', methods=['POST'])
+def import_rows(kind):
+    """Import a CSV or NDJSON body, read and written in batches as it streams in"""
+    fmt = request_format()
+    if kind not in KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(KINDS)}"}), 404
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+
+    started = time.perf_counter()
+    lines = io.TextIOWrapper(io.BufferedReader(RequestBody(request.stream)), encoding='utf-8', newline='')
+    try:
+        result = run_import(kind, lines, fmt)
+    except BulkImportError as e:
+        return jsonify({'error': str(e), 'imported': e.imported}), 400
+
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return jsonify(result)
+
+def file_format(path, fmt):
+    """Explicit --format, else guessed from the file extension"""
+    if fmt:
+        return fmt
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+@bulk_bp.cli.command('export')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', default='-')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension, else csv')
+@click.option('--symbols', help='Comma-separated symbols (candles)')
+@click.option('--resolution', help='Candle resolution (candles)')
+@click.option('--from', 'from_ts', type=int, help='First bar, UNIX seconds (candles)')
+@click.option('--to', 'to_ts', type=int, help='Last bar, UNIX seconds (candles)')
+@click.option('--user-id', type=int, help='Only this user (watchlists, alerts)')
+@click.option('--status', help='Only alerts with this status (alerts)')
+def export_command(kind, path, fmt, symbols, resolution, from_ts, to_ts, user_id, status):
+    """Write every row of KIND to PATH (default stdout)"""
+    fmt = file_format(path, fmt)
+    args = {
+        'symbols': symbols, 'resolution': resolution, 'from': from_ts, 'to': to_ts,
+        'user_id': user_id, 'status': status
+    }
+    columns, export, _ = KINDS[kind]
+    out = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+    try:
+        out.writelines(bulk.encode(export(**export_filters(kind, args)), columns, fmt))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+@bulk_bp.cli.command('import')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', default='-')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension, else csv')
+def import_command(kind, path, fmt):
+    """Import rows of KIND from PATH (default stdin)"""
+    fmt = file_format(path, fmt)
+    started = time.perf_counter()
+    lines = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+    try:
+        result = run_import(kind, lines, fmt)
+    except BulkImportError as e:
+        raise click.ClickException(f'{e} ({e.imported} rows imported before it)')
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+    click.echo(f"{result} in {time.perf_counter() - started:.1f}s", err=True)
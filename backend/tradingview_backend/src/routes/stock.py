@@ -1,76 +1,302 @@
-from flask import Blueprint, jsonify, request
-import requests
+from flask import Blueprint, Response, jsonify, request
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from src.services import candle_store, finnhub, market_data, metrics, resample
+from src.services.candle_format import CANDLE_FORMATS, candle_response
+from src.services.indicators import INDICATORS, IndicatorCache
+from src.services.quote_cache import QuoteCache
+from src.services.quote_stream import QuoteHub
+from src.services.resilience import background_priority
+from src.services.symbol_index import SymbolIndex, read_symbols_csv
 
 stock_bp = Blueprint('stock', __name__)
-# Finnhub API configuration
-FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY")
-FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
+
+# Quote cache configuration (seconds / entries)
+QUOTE_CACHE_TTL = float(os.environ.get("QUOTE_CACHE_TTL", 15))
+QUOTE_CACHE_STALE_TTL = float(os.environ.get("QUOTE_CACHE_STALE_TTL", 120))
+QUOTE_CACHE_MAX_SIZE = int(os.environ.get("QUOTE_CACHE_MAX_SIZE", 2048))
+
+quote_cache = QuoteCache(
+    ttl=QUOTE_CACHE_TTL,
+    stale_ttl=QUOTE_CACHE_STALE_TTL,
+    max_size=QUOTE_CACHE_MAX_SIZE
+)
+metrics.register_cache('quote', quote_cache, {'hit': 'hits', 'stale_hit': 'stale_hits', 'miss': 'misses'})
+
+# Batch quote configuration
+QUOTE_BATCH_MAX_SYMBOLS = int(os.environ.get("QUOTE_BATCH_MAX_SYMBOLS", 100))
+
+# Bounded pool for fanning out batch quote fetches; sized to the connection pool
+quote_executor = ThreadPoolExecutor(
+    max_workers=finnhub.FINNHUB_POOL_SIZE,
+    thread_name_prefix='quote-fetch'
+)
+
+# Memoized indicator series, updated incrementally as new bars arrive
+INDICATOR_CACHE_MAX_SIZE = int(os.environ.get("INDICATOR_CACHE_MAX_SIZE", 256))
+indicator_cache = IndicatorCache(max_size=INDICATOR_CACHE_MAX_SIZE)
+metrics.register_cache('indicator', indicator_cache)
+
+# Local symbol universe for search; upstream is only asked when it misses
+SYMBOLS_FILE = os.environ.get(
+    "SYMBOLS_FILE", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'symbols.csv')
+)
+SEARCH_RESULT_LIMIT = int(os.environ.get("SEARCH_RESULT_LIMIT", 10))
+symbol_index = SymbolIndex.from_csv(SYMBOLS_FILE)
+
+# Quote streaming configuration (seconds)
+QUOTE_STREAM_INTERVAL = float(os.environ.get("QUOTE_STREAM_INTERVAL", 5))
+QUOTE_STREAM_HEARTBEAT = float(os.environ.get("QUOTE_STREAM_HEARTBEAT", 15))
+# Streams end after this long and the browser reconnects, so no connection
+# holds a server thread (or one worker) for good
+QUOTE_STREAM_MAX_AGE = float(os.environ.get("QUOTE_STREAM_MAX_AGE", 300))
+# Each open stream holds a thread; past this many per process new streams are
+# refused so ordinary requests keep their threads (0 = no limit)
+QUOTE_STREAM_MAX_CONNECTIONS = int(os.environ.get("QUOTE_STREAM_MAX_CONNECTIONS", 0))
+stream_slots = threading.BoundedSemaphore(QUOTE_STREAM_MAX_CONNECTIONS) if QUOTE_STREAM_MAX_CONNECTIONS > 0 else None
+
+def get_background_quote(symbol):
+    """Cached quote lookup for shared pollers, queued behind interactive requests"""
+    with background_priority():
+        return quote_cache.get(symbol, fetch_quote)
+
+# One shared poller per watched symbol, reading through the quote cache
+quote_hub = QuoteHub(source=get_background_quote, interval=QUOTE_STREAM_INTERVAL)
+
+def parse_symbols(raw_symbols):
+    """Split a comma-separated symbol list, uppercased and deduplicated in order"""
+    return list(dict.fromkeys(
+        s.strip().upper() for s in raw_symbols.split(',') if s.strip()
+    ))
+
+def parse_shaping_args(resolution):
+    """Read ?interval= and ?max_points= and return (resolution, interval, max_points, error)"""
+    interval = request.args.get("interval")
+    if interval:
+        interval = resample.normalize_interval(interval)
+        if interval is None:
+            return resolution, None, None, f"interval must be one of {', '.join(resample.RESAMPLE_BASE)}"
+        # Read the matching stored resolution; 1w/1M are then built locally from D
+        resolution = resample.RESAMPLE_BASE[interval]
+    
+    max_points = request.args.get("max_points", type=int)
+    if max_points is not None and max_points < 3:
+        return resolution, interval, None, "max_points must be at least 3"
+    
+    return resolution, interval, max_points, None
+
+def parse_since(max_points):
+    """Read ?since= (the client's newest bar timestamp) and return (since, error)"""
+    since = request.args.get("since", type=int)
+    if since is not None and max_points is not None:
+        # A downsampled tail would not line up with the points the client holds
+        return None, "since cannot be combined with max_points"
+    return since, None
+
+def empty_candles():
+    return {key: [] for key in ("t", "o", "h", "l", "c", "v")}
+
+def fetch_symbol_universe():
+    """Load the bundled symbols plus the provider's full US list as (symbol, name, type) tuples"""
+    with background_priority():
+        data = market_data.symbols('US')
+    return read_symbols_csv(SYMBOLS_FILE) + [
+        (item.get('symbol', ''), item.get('description', ''), item.get('type', ''))
+        for item in data or []
+    ]
+
+def upstream_error_response(error):
+    """Translate an UpstreamError into a JSON error response"""
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status or 502
+    if error.retry_after:
+        response.headers['Retry-After'] = error.retry_after
+    return response
+
+def internal_error_response(error):
+    """Log and count an unexpected error, then answer with a generic 500"""
+    metrics.record_exception(error)
+    return jsonify({'error': str(error)}), 500
+
+def fetch_quote(symbol):
+    """Fetch a normalized quote from the market data providers, or None if the symbol has no data"""
+    data = market_data.quote(symbol)
+    
+    if data and data.get('c') is not None:
+        return {
+            'symbol': symbol,
+            'price': data['c'],
+            'change': data['d'],
+            'change_percent': data['dp'],
+            'high': data['h'],
+            'low': data['l'],
+            'open': data['o'],
+            'previous_close': data['pc'],
+            'timestamp': data['t']
+        }
+    return None
+
+def get_quotes(symbols):
+    """Fetch quotes for many symbols concurrently, returning (quotes, errors)"""
+    futures = {
+        symbol: quote_executor.submit(quote_cache.get, symbol, fetch_quote)
+        for symbol in symbols
+    }
+    
+    quotes = {}
+    errors = {}
+    for symbol, future in futures.items():
+        try:
+            quote = future.result()
+        except market_data.UpstreamError as e:
+            # Fall back to the last known quote while upstream is unhealthy
+            quote = quote_cache.peek(symbol)
+            if quote is None:
+                errors[symbol] = str(e)
+                continue
+        except Exception as e:
+            errors[symbol] = str(e)
+            continue
+        
+        if quote is not None:
+            quotes[symbol] = quote
+        else:
+            errors[symbol] = 'Stock not found'
+    
+    return quotes, errors
 
 @stock_bp.route('/stocks/quote/<symbol>', methods=['GET'])
 def get_stock_quote(symbol):
     """Get real-time stock quote"""
     try:
-        params = {
-            'symbol': symbol.upper(),
-            'token': FINNHUB_API_KEY
-        }
-        
-        response = requests.get(f"{FINNHUB_BASE_URL}/quote", params=params)
-        data = response.json()
+        quote = quote_cache.get(symbol.upper(), fetch_quote)
         
-        if data and data.get('c') is not None:
-            return jsonify({
-                'symbol': symbol.upper(),
-                'price': data['c'],
-                'change': data['d'],
-                'change_percent': data['dp'],
-                'high': data['h'],
-                'low': data['l'],
-                'open': data['o'],
-                'previous_close': data['pc'],
-                'timestamp': data['t']
-            })
+        if quote is not None:
+            return jsonify(quote)
         else:
-            return jsonify({'error': 'Stock not found or API limit reached'}), 404
+            return jsonify({'error': 'Stock not found'}), 404
             
+    except market_data.UpstreamError as e:
+        # Serve the last known quote rather than failing while upstream is unhealthy
+        cached = quote_cache.peek(symbol.upper())
+        if cached is None:
+            return upstream_error_response(e)
+        response = jsonify(cached)
+        response.headers['X-Data-Stale'] = 'true'
+        return response
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return internal_error_response(e)
+
+@stock_bp.route('/stocks/quotes', methods=['GET'])
+def get_stock_quotes():
+    """Get real-time quotes for a comma-separated list of symbols"""
+    symbols = parse_symbols(request.args.get('symbols', ''))
+    
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    if len(symbols) > QUOTE_BATCH_MAX_SYMBOLS:
+        return jsonify({'error': f'At most {QUOTE_BATCH_MAX_SYMBOLS} symbols per request'}), 400
+    
+    quotes, errors = get_quotes(symbols)
+    
+    return jsonify({
+        'quotes': quotes,
+        'errors': errors
+    })
+
+@stock_bp.route('/stocks/stream', methods=['GET'])
+def stream_stock_quotes():
+    """Stream quote updates for a comma-separated list of symbols (Server-Sent Events)"""
+    symbols = parse_symbols(request.args.get('symbols', ''))
+    
+    if not symbols:
+        return jsonify({'error': 'symbols is required'}), 400
+    if len(symbols) > QUOTE_BATCH_MAX_SYMBOLS:
+        return jsonify({'error': f'At most {QUOTE_BATCH_MAX_SYMBOLS} symbols per request'}), 400
+    if stream_slots is not None and not stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open quote streams, poll /stocks/quote instead'})
+        response.headers['Retry-After'] = str(int(QUOTE_STREAM_MAX_AGE))
+        return response, 503
+    
+    def generate():
+        subscription = quote_hub.subscribe(symbols)
+        deadline = time.monotonic() + QUOTE_STREAM_MAX_AGE
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                updates = subscription.next(timeout=min(QUOTE_STREAM_HEARTBEAT, remaining))
+                if not updates:
+                    # Comment line keeps proxies open and detects disconnected clients
+                    yield ": keepalive\n\n"
+                    continue
+                for quote in updates.values():
+                    yield f"event: quote\ndata: {json.dumps(quote)}\n\n"
+        finally:
+            quote_hub.unsubscribe(subscription)
+    
+    response = Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if stream_slots is not None:
+        # Runs even when the client leaves before the generator starts
+        response.call_on_close(stream_slots.release)
+    return response
 
 @stock_bp.route('/stocks/historical/<symbol>', methods=['GET'])
 def get_historical_data(symbol):
     """Get historical stock data"""
     try:
         resolution = request.args.get("resolution", "D")  # 1, 5, 15, 30, 60, D, W, M
+        resolution, interval, max_points, error = parse_shaping_args(resolution)
+        if error:
+            return jsonify({"error": error}), 400
+        since, error = parse_since(max_points)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = request.args.get("format", "json")  # json, columnar, binary
+        if fmt not in CANDLE_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(CANDLE_FORMATS)}"}), 400
         
         # Finnhub requires start and end time in UNIX timestamp
         to_timestamp = int(datetime.now().timestamp())
         from_timestamp = int((datetime.now() - timedelta(days=365)).timestamp()) # Last 1 year of data
         
-        params = {
-            "symbol": symbol.upper(),
-            "resolution": resolution,
-            "from": from_timestamp,
-            "to": to_timestamp,
-            "token": FINNHUB_API_KEY
-        }
+        if since is not None:
+            # Delta sync: resend the client's newest bar (it may still be forming) and
+            # everything after it. With interval, since is that bucket's start.
+            from_timestamp = max(from_timestamp, since)
+        
+        data = candle_store.get_candles(symbol.upper(), resolution, from_timestamp, to_timestamp)
+        if not data and since is not None:
+            data = empty_candles()
+        if data:
+            data = resample.shape_candles(data, interval, max_points)
+            resolution = interval or resolution
+        
+        if data and fmt != "json":
+            return candle_response(symbol.upper(), resolution, data, fmt)
         
-        response = requests.get(f"{FINNHUB_BASE_URL}/stock/candle", params=params)
-
-        data = response.json()
-        
-        if data and data["s"] == "ok":
-            historical_data = []
-            for i in range(len(data["t"])):
-                historical_data.append({
-                    "date": datetime.fromtimestamp(data["t"][i]).strftime("%Y-%m-%d"),
-                    "open": data["o"][i],
-                    "high": data["h"][i],
-                    "low": data["l"][i],
-                    "close": data["c"][i],
-                    "volume": data["v"][i]
-                })
+        if data:
+            columns = resample.to_lists(data)
+            historical_data = [
+                {
+                    "date": datetime.fromtimestamp(t).strftime("%Y-%m-%d"),
+                    "open": o,
+                    "high": h,
+                    "low": l,
+                    "close": c,
+                    "volume": v
+                }
+                for t, o, h, l, c, v in zip(*(columns[k] for k in ("t", "o", "h", "l", "c", "v")))
+            ]
             
             historical_data.sort(key=lambda x: x["date"], reverse=True)
             
@@ -80,73 +306,107 @@ def get_historical_data(symbol):
                 "data": historical_data
             })
         else:
-            return jsonify({"error": "Historical data not found or API limit reached"}), 404
+            return jsonify({"error": "Historical data not found"}), 404
             
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return internal_error_response(e)
 
 @stock_bp.route('/stocks/search/<query>', methods=['GET'])
 def search_stocks(query):
     """Search for stocks by symbol or company name"""
     try:
-        params = {
-            'q': query,
-            'token': FINNHUB_API_KEY
-        }
+        matches = symbol_index.search(query, limit=SEARCH_RESULT_LIMIT, fuzzy=False)
+        if matches:
+            return jsonify({
+                'query': query,
+                'matches': matches
+            })
         
-        response = requests.get(f"{FINNHUB_BASE_URL}/search", params=params)
-        data = response.json()
-        
-        if data and data['result']:
-            matches = []
-            for match in data['result']:
-                matches.append({
-                    'symbol': match.get('symbol', ''),
-                    'name': match.get('description', ''),
-                    'type': match.get('type', '')
-                })
-            
+        # No exact or prefix hit: the ticker may simply be missing from the
+        # local universe, so ask upstream and keep local fuzzy matches after its
+        fuzzy_matches = symbol_index.search(query, limit=SEARCH_RESULT_LIMIT)
+        try:
+            data = market_data.search(query)
+        except market_data.UpstreamError:
+            if not fuzzy_matches:
+                raise
+            data = None
+        
+        matches = []
+        for match in (data or {}).get('result') or []:
+            matches.append({
+                'symbol': match.get('symbol', ''),
+                'name': match.get('description', ''),
+                'type': match.get('type', '')
+            })
+        
+        # Remember upstream hits so the next lookup is answered locally
+        symbol_index.add((m['symbol'], m['name'], m['type']) for m in matches)
+        
+        seen = {m['symbol'] for m in matches}
+        matches.extend(m for m in fuzzy_matches if m['symbol'] not in seen)
+        
+        if matches:
             return jsonify({
                 'query': query,
                 'matches': matches
             })
         else:
-            return jsonify({'error': 'No matches found or API limit reached'}), 404
+            return jsonify({'error': 'No matches found'}), 404
             
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return internal_error_response(e)
 
 @stock_bp.route("/stocks/intraday/<symbol>", methods=["GET"])
 def get_intraday_data(symbol):
     """Get intraday stock data"""
     try:
         resolution = request.args.get("resolution", "1")  # 1, 5, 15, 30, 60
+        resolution, interval, max_points, error = parse_shaping_args(resolution)
+        if error:
+            return jsonify({"error": error}), 400
+        since, error = parse_since(max_points)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = request.args.get("format", "json")  # json, columnar, binary
+        if fmt not in CANDLE_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(CANDLE_FORMATS)}"}), 400
         
         to_timestamp = int(datetime.now().timestamp())
         from_timestamp = int((datetime.now() - timedelta(days=1)).timestamp()) # Last 1 day of data
         
-        params = {
-            "symbol": symbol.upper(),
-            "resolution": resolution,
-            "from": from_timestamp,
-            "to": to_timestamp,
-            "token": FINNHUB_API_KEY
-        }
+        if since is not None:
+            # Delta sync: resend the client's newest bar (it may still be forming) and
+            # everything after it. With interval, since is that bucket's start.
+            from_timestamp = max(from_timestamp, since)
         
-        response = requests.get(f"{FINNHUB_BASE_URL}/stock/candle", params=params)
-        data = response.json()
-        
-        if data and data["s"] == "ok":
-            intraday_data = []
-            for i in range(len(data["t"])):
-                intraday_data.append({
-                    "timestamp": datetime.fromtimestamp(data["t"][i]).strftime("%Y-%m-%d %H:%M:%S"),
-                    "open": data["o"][i],
-                    "high": data["h"][i],
-                    "low": data["l"][i],
-                    "close": data["c"][i],
-                    "volume": data["v"][i]
-                })
+        data = candle_store.get_candles(symbol.upper(), resolution, from_timestamp, to_timestamp)
+        if not data and since is not None:
+            data = empty_candles()
+        if data:
+            data = resample.shape_candles(data, interval, max_points)
+            resolution = interval or resolution
+        
+        if data and fmt != "json":
+            return candle_response(symbol.upper(), resolution, data, fmt)
+        
+        if data:
+            columns = resample.to_lists(data)
+            intraday_data = [
+                {
+                    "timestamp": datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S"),
+                    "open": o,
+                    "high": h,
+                    "low": l,
+                    "close": c,
+                    "volume": v
+                }
+                for t, o, h, l, c, v in zip(*(columns[k] for k in ("t", "o", "h", "l", "c", "v")))
+            ]
             
             intraday_data.sort(key=lambda x: x["timestamp"], reverse=True)
             
@@ -156,8 +416,62 @@ def get_intraday_data(symbol):
                 "data": intraday_data
             })
         else:
-            return jsonify({"error": "Intraday data not found or API limit reached"}), 404
+            return jsonify({"error": "Intraday data not found"}), 404
             
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return internal_error_response(e)
 
+@stock_bp.route("/stocks/indicators/<symbol>", methods=["GET"])
+def get_indicator(symbol):
+    """Get a technical indicator (sma, ema, rsi, macd, bollinger) over stored candles"""
+    try:
+        name = request.args.get("indicator", "sma").lower()
+        if name not in INDICATORS:
+            return jsonify({"error": f"indicator must be one of {', '.join(INDICATORS)}"}), 400
+        
+        resolution = request.args.get("resolution", "D")  # 1, 5, 15, 30, 60, D, W, M
+        default_days = 365 if resolution in ("D", "W", "M") else 1
+        days = request.args.get("days", default_days, type=int)
+        if days <= 0:
+            return jsonify({"error": "days must be a positive number"}), 400
+        
+        _, defaults = INDICATORS[name]
+        params = {}
+        for key, default in defaults.items():
+            params[key] = request.args.get(key, default, type=type(default))
+            if params[key] is None or params[key] <= 0:
+                return jsonify({"error": f"{key} must be a positive number"}), 400
+        
+        to_timestamp = int(datetime.now().timestamp())
+        from_timestamp = int((datetime.now() - timedelta(days=days)).timestamp())
+        # Start on a UTC day boundary so the window's first bar moves once a day rather
+        # than with every request, and the cache can extend the previous result
+        from_timestamp -= from_timestamp % resample.DAY
+        
+        data = candle_store.get_candles(symbol.upper(), resolution, from_timestamp, to_timestamp)
+        
+        if data:
+            key = (symbol.upper(), resolution, name, tuple(sorted(params.items())))
+            timestamps, values = indicator_cache.compute(key, name, params, data["t"], data["c"])
+            
+            return jsonify({
+                "symbol": symbol.upper(),
+                "resolution": resolution,
+                "indicator": name,
+                "params": params,
+                "t": timestamps.tolist(),
+                # NaN (warm-up bars) is not valid JSON, so send null
+                "values": {
+                    output: [None if v != v else v for v in series.tolist()]
+                    for output, series in values.items()
+                }
+            })
+        else:
+            return jsonify({"error": "Historical data not found"}), 404
+            
+    except market_data.UpstreamError as e:
+        return upstream_error_response(e)
+    except Exception as e:
+        return internal_error_response(e)
@@ -1,14 +1,70 @@
 from flask import Blueprint, jsonify, request
-from src.models.stock import Watchlist, WatchlistItem, db
+from sqlalchemy.orm import selectinload
+from src.models.stock import Alert, Watchlist, WatchlistItem, db
+from src.routes.stock import get_quotes
+from src.services import changes
+from src.services.pagination import keyset_page, page_response, parse_page_args
 
 watchlist_bp = Blueprint('watchlist', __name__)
 
 @watchlist_bp.route('/watchlists', methods=['GET'])
 def get_watchlists():
-    """Get all watchlists for a user"""
-    user_id = request.args.get('user_id', 1)  # Default to user 1 for now
-    watchlists = Watchlist.query.filter_by(user_id=user_id).all()
-    return jsonify([watchlist.to_dict() for watchlist in watchlists])
+    """Get all watchlists for a user, or only the changes after ?since_version="""
+    user_id = request.args.get('user_id', 1, type=int)  # Default to user 1 for now
+    since_version = request.args.get('since_version', type=int)
+    limit, cursor, error = parse_page_args()
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Answer repeat polls from the version alone, before loading any rows
+    version = changes.current_version(user_id, changes.WATCHLISTS)
+    etag = changes.collection_etag(user_id, changes.WATCHLISTS, version)
+    unchanged = changes.not_modified(etag, version)
+    if unchanged:
+        return unchanged
+    
+    if since_version is not None:
+        response = changes.feed_response(
+            user_id, changes.WATCHLISTS, Watchlist, since_version, [selectinload(Watchlist.items)]
+        )
+        return changes.versioned(response, etag, version)
+    
+    # Load every page's items in one extra query instead of one per watchlist
+    query = Watchlist.query.filter_by(user_id=user_id).options(selectinload(Watchlist.items))
+    watchlists, next_cursor = keyset_page(query, Watchlist.id, limit, cursor)
+    response = page_response([watchlist.to_dict() for watchlist in watchlists], next_cursor)
+    return changes.versioned(response, etag, version)
+
+@watchlist_bp.route('/watchlists/snapshot', methods=['GET'])
+def get_watchlist_snapshot():
+    """Get a user's watchlists, latest quotes for every listed symbol and active alerts in one call"""
+    user_id = request.args.get('user_id', 1, type=int)  # Default to user 1 for now
+    
+    watchlists = (
+        Watchlist.query.filter_by(user_id=user_id)
+        .options(selectinload(Watchlist.items))
+        .order_by(Watchlist.id)
+        .all()
+    )
+    alerts = Alert.query.filter_by(user_id=user_id, status='active').order_by(Alert.id).all()
+    
+    # Every symbol across all lists, deduplicated in first-seen order
+    symbols = list(dict.fromkeys(
+        item.stock_symbol for watchlist in watchlists for item in watchlist.items
+    ))
+    quotes, quote_errors = get_quotes(symbols)
+    
+    alerts_by_symbol = {}
+    for alert in alerts:
+        alerts_by_symbol.setdefault(alert.stock_symbol, []).append(alert.to_dict())
+    
+    return jsonify({
+        'user_id': user_id,
+        'watchlists': [watchlist.to_dict() for watchlist in watchlists],
+        'quotes': quotes,
+        'quote_errors': quote_errors,
+        'alerts': alerts_by_symbol
+    })
 
 @watchlist_bp.route('/watchlists', methods=['POST'])
 def create_watchlist():
@@ -19,6 +75,8 @@ def create_watchlist():
     
     watchlist = Watchlist(user_id=user_id, name=name)
     db.session.add(watchlist)
+    db.session.flush()
+    changes.record(user_id, changes.WATCHLISTS, watchlist.id)
     db.session.commit()
     
     return jsonify(watchlist.to_dict()), 201
@@ -36,6 +94,7 @@ def update_watchlist(watchlist_id):
     data = request.json
     
     watchlist.name = data.get('name', watchlist.name)
+    changes.record(watchlist.user_id, changes.WATCHLISTS, watchlist.id)
     db.session.commit()
     
     return jsonify(watchlist.to_dict())
@@ -45,6 +104,7 @@ def delete_watchlist(watchlist_id):
     """Delete a watchlist"""
     watchlist = Watchlist.query.get_or_404(watchlist_id)
     db.session.delete(watchlist)
+    changes.record(watchlist.user_id, changes.WATCHLISTS, watchlist.id, op='delete')
     db.session.commit()
     
     return '', 204
@@ -70,6 +130,7 @@ def add_stock_to_watchlist(watchlist_id):
     
     item = WatchlistItem(watchlist_id=watchlist_id, stock_symbol=stock_symbol)
     db.session.add(item)
+    changes.record(watchlist.user_id, changes.WATCHLISTS, watchlist_id)
     db.session.commit()
     
     return jsonify(item.to_dict()), 201
@@ -82,6 +143,7 @@ def remove_stock_from_watchlist(watchlist_id, item_id):
         watchlist_id=watchlist_id
     ).first_or_404()
     
+    changes.record(item.watchlist.user_id, changes.WATCHLISTS, watchlist_id)
     db.session.delete(item)
     db.session.commit()
     
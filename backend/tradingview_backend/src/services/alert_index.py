@@ -0,0 +1,118 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+_INF = float('inf')
+
+
+class AlertIndex:
+    """Active alerts grouped by symbol with thresholds kept in sorted lists.
+
+    ``price_above`` alerts fire when price >= target, so the crossed alerts
+    for a price are a prefix of the ascending target list; ``price_below``
+    alerts fire when price <= target, a suffix. Both are found with one bisect,
+    making a price update O(log n + k) instead of a scan over every alert.
+
+    The index is loaded lazily from a row loader and treated as stale after
+    ``max_age`` seconds so that changes made by other worker processes are
+    eventually picked up.
+    """
+
+    def __init__(self, loader, max_age=300.0):
+        self.loader = loader
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._above = {}
+        self._below = {}
+        self._by_id = {}
+        self._loaded_at = None
+
+    def ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+                self.reload()
+
+    def reload(self):
+        """Rebuild the index from (id, symbol, alert_type, target_value) rows"""
+        with self._lock:
+            self._above = {}
+            self._below = {}
+            self._by_id = {}
+            for alert_id, symbol, alert_type, target in self.loader():
+                self._by_id[alert_id] = (symbol, alert_type, target)
+                self._side(alert_type).setdefault(symbol, []).append((target, alert_id))
+            for side in (self._above, self._below):
+                for entries in side.values():
+                    entries.sort()
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def add(self, alert_id, symbol, alert_type, target):
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self.remove(alert_id)
+            self._by_id[alert_id] = (symbol, alert_type, target)
+            insort(self._side(alert_type).setdefault(symbol, []), (target, alert_id))
+
+    def remove(self, alert_id):
+        with self._lock:
+            entry = self._by_id.pop(alert_id, None)
+            if entry is None:
+                return
+            symbol, alert_type, target = entry
+            entries = self._side(alert_type)[symbol]
+            del entries[bisect_left(entries, (target, alert_id))]
+            if not entries:
+                del self._side(alert_type)[symbol]
+
+    def sync(self, alert):
+        """Bring the index in line with an Alert row after it was changed"""
+        if alert.status == 'active':
+            self.add(alert.id, alert.stock_symbol, alert.alert_type, alert.target_value)
+        else:
+            self.remove(alert.id)
+
+    def pop_crossed(self, prices):
+        """Remove and return {symbol: [alert ids]} for alerts crossed by {symbol: price}"""
+        self.ensure_loaded()
+        crossed = {}
+        with self._lock:
+            for symbol, price in prices.items():
+                ids = []
+                above = self._above.get(symbol)
+                if above:
+                    k = bisect_right(above, (price, _INF))
+                    ids.extend(alert_id for _, alert_id in above[:k])
+                    del above[:k]
+                    if not above:
+                        del self._above[symbol]
+
+                below = self._below.get(symbol)
+                if below:
+                    k = bisect_left(below, (price, -_INF))
+                    ids.extend(alert_id for _, alert_id in below[k:])
+                    del below[k:]
+                    if not below:
+                        del self._below[symbol]
+
+                if ids:
+                    crossed[symbol] = ids
+                    for alert_id in ids:
+                        del self._by_id[alert_id]
+        return crossed
+
+    def symbols(self):
+        """Return {symbol: number of active alerts}"""
+        self.ensure_loaded()
+        with self._lock:
+            counts = {}
+            for symbol, _, _ in self._by_id.values():
+                counts[symbol] = counts.get(symbol, 0) + 1
+            return counts
+
+    def _side(self, alert_type):
+        return self._above if alert_type == 'price_above' else self._below
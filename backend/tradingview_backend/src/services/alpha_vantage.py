@@ -0,0 +1,212 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import requests
+from requests.adapters import HTTPAdapter
+from src.services import metrics
+from src.services.resilience import (
+    CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket, UpstreamError, current_priority
+)
+
+# Intraday series are keyed by US/Eastern wall-clock time
+try:
+    EXCHANGE_TZ = ZoneInfo('America/New_York')
+except ZoneInfoNotFoundError:
+    # No tz database in the image: fall back to EST (an hour off during DST)
+    EXCHANGE_TZ = timezone(timedelta(hours=-5))
+
+# Alpha Vantage API configuration
+ALPHA_VANTAGE_API_KEY = os.environ.get("ALPHA_VANTAGE_API_KEY")
+ALPHA_VANTAGE_BASE_URL = os.environ.get("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+ALPHA_VANTAGE_POOL_SIZE = int(os.environ.get("ALPHA_VANTAGE_POOL_SIZE", 4))
+
+# The free tier allows 5 calls per minute (and 25 per day)
+ALPHA_VANTAGE_RATE_LIMIT = float(os.environ.get("ALPHA_VANTAGE_RATE_LIMIT", 5))
+ALPHA_VANTAGE_BURST = int(os.environ.get("ALPHA_VANTAGE_BURST", 5))
+ALPHA_VANTAGE_QUEUE_TIMEOUT = float(os.environ.get("ALPHA_VANTAGE_QUEUE_TIMEOUT", 10))
+
+ALPHA_VANTAGE_CONNECT_TIMEOUT = float(os.environ.get("ALPHA_VANTAGE_CONNECT_TIMEOUT", 3))
+ALPHA_VANTAGE_READ_TIMEOUT = float(os.environ.get("ALPHA_VANTAGE_READ_TIMEOUT", 10))
+
+ALPHA_VANTAGE_BREAKER_THRESHOLD = int(os.environ.get("ALPHA_VANTAGE_BREAKER_THRESHOLD", 3))
+ALPHA_VANTAGE_BREAKER_RESET = float(os.environ.get("ALPHA_VANTAGE_BREAKER_RESET", 60))
+
+# Serve synthetic data from an in-process fake instead of the real API
+ALPHA_VANTAGE_FAKE = os.environ.get("ALPHA_VANTAGE_FAKE", "false").lower() == "true"
+ALPHA_VANTAGE_FAKE_LATENCY = float(os.environ.get("ALPHA_VANTAGE_FAKE_LATENCY", 0))
+
+ENABLED = bool(ALPHA_VANTAGE_API_KEY) or ALPHA_VANTAGE_FAKE
+
+# Finnhub resolution -> (function, intraday interval, series key in the response)
+SERIES_FUNCTIONS = {
+    '1': ('TIME_SERIES_INTRADAY', '1min', 'Time Series (1min)'),
+    '5': ('TIME_SERIES_INTRADAY', '5min', 'Time Series (5min)'),
+    '15': ('TIME_SERIES_INTRADAY', '15min', 'Time Series (15min)'),
+    '30': ('TIME_SERIES_INTRADAY', '30min', 'Time Series (30min)'),
+    '60': ('TIME_SERIES_INTRADAY', '60min', 'Time Series (60min)'),
+    'D': ('TIME_SERIES_DAILY', None, 'Time Series (Daily)'),
+    'W': ('TIME_SERIES_WEEKLY', None, 'Weekly Time Series'),
+    'M': ('TIME_SERIES_MONTHLY', None, 'Monthly Time Series')
+}
+# Bar width in seconds, used to decide between compact (last 100 bars) and full output
+SERIES_STEP = {'1': 60, '5': 300, '15': 900, '30': 1800, '60': 3600, 'D': 86400, 'W': 604800, 'M': 2592000}
+COMPACT_BARS = 100
+
+# Pooled keep-alive connections, as for Finnhub
+session = requests.Session()
+if ALPHA_VANTAGE_FAKE:
+    from src.services.fake_alpha_vantage import FakeAlphaVantageAdapter
+    _adapter = FakeAlphaVantageAdapter(latency=ALPHA_VANTAGE_FAKE_LATENCY)
+else:
+    _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ALPHA_VANTAGE_POOL_SIZE)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+rate_limiter = TokenBucket(rate=ALPHA_VANTAGE_RATE_LIMIT / 60.0, capacity=ALPHA_VANTAGE_BURST)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=ALPHA_VANTAGE_BREAKER_THRESHOLD,
+    reset_timeout=ALPHA_VANTAGE_BREAKER_RESET
+)
+
+
+def get(function, params=None, queue_timeout=None):
+    """Call an Alpha Vantage function and return the decoded JSON body.
+
+    Unlike the Finnhub client there are no retries: Alpha Vantage serves as
+    a fallback, so a failure is handed straight back to the router. Quota
+    messages, which arrive as HTTP 200 with a "Note" or "Information" body,
+    are raised as RateLimitedError.
+    """
+    params = dict(params or {})
+    params['function'] = function
+    params['apikey'] = ALPHA_VANTAGE_API_KEY
+    if queue_timeout is None:
+        queue_timeout = ALPHA_VANTAGE_QUEUE_TIMEOUT
+
+    if not circuit_breaker.allow():
+        metrics.upstream_rejections.inc(endpoint=function, reason='circuit_open')
+        raise CircuitOpenError('Alpha Vantage is temporarily unavailable', status=503)
+    if not rate_limiter.acquire(current_priority(), timeout=queue_timeout):
+        circuit_breaker.release()
+        metrics.upstream_rejections.inc(endpoint=function, reason='rate_limited')
+        raise RateLimitedError('Alpha Vantage rate limit reached, try again shortly', status=429)
+
+    started = time.perf_counter()
+    try:
+        response = session.get(
+            ALPHA_VANTAGE_BASE_URL,
+            params=params,
+            timeout=(ALPHA_VANTAGE_CONNECT_TIMEOUT, ALPHA_VANTAGE_READ_TIMEOUT)
+        )
+    except requests.RequestException as e:
+        metrics.upstream_duration.observe(time.perf_counter() - started, endpoint=function)
+        metrics.upstream_requests.inc(endpoint=function, status=type(e).__name__)
+        circuit_breaker.record_failure()
+        raise UpstreamError(f'Alpha Vantage unreachable: {e}', status=504)
+    metrics.upstream_duration.observe(time.perf_counter() - started, endpoint=function)
+    metrics.upstream_requests.inc(endpoint=function, status=response.status_code)
+
+    if response.status_code == 429 or response.status_code >= 500:
+        circuit_breaker.record_failure()
+        error_type = RateLimitedError if response.status_code == 429 else UpstreamError
+        raise error_type(f'Alpha Vantage error ({response.status_code})', status=502)
+    if response.status_code < 400:
+        try:
+            data = response.json()
+        except ValueError:
+            circuit_breaker.record_failure()
+            raise UpstreamError('Alpha Vantage sent an invalid response', status=502)
+    circuit_breaker.record_success()
+    if response.status_code >= 400:
+        raise UpstreamError(f'Alpha Vantage request rejected ({response.status_code})', status=502)
+
+    if isinstance(data, dict) and ('Note' in data or 'Information' in data):
+        raise RateLimitedError('Alpha Vantage rate limit reached, try again shortly', status=429)
+    return data
+
+
+def _number(value):
+    try:
+        return float(str(value).rstrip('%'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _bar_timestamp(key, intraday):
+    """UNIX time of a series key: exchange-local minutes intraday, UTC midnight per day otherwise"""
+    if intraday:
+        local = datetime.strptime(key, '%Y-%m-%d %H:%M:%S').replace(tzinfo=EXCHANGE_TZ)
+        return int(local.timestamp())
+    return int(datetime.strptime(key, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+
+
+def quote(symbol, queue_timeout=None):
+    """Finnhub-shaped /quote body ({} when the symbol is unknown)"""
+    data = get('GLOBAL_QUOTE', {'symbol': symbol}, queue_timeout).get('Global Quote') or {}
+    price = _number(data.get('05. price'))
+    if price is None:
+        return {}
+    day = data.get('07. latest trading day')
+    return {
+        'c': price,
+        'd': _number(data.get('09. change')),
+        'dp': _number(data.get('10. change percent')),
+        'h': _number(data.get('03. high')),
+        'l': _number(data.get('04. low')),
+        'o': _number(data.get('02. open')),
+        'pc': _number(data.get('08. previous close')),
+        't': _bar_timestamp(day, False) if day else int(time.time())
+    }
+
+
+def candles(symbol, resolution, from_ts, to_ts, queue_timeout=None):
+    """Finnhub-shaped /stock/candle body for [from_ts, to_ts]"""
+    if resolution not in SERIES_FUNCTIONS:
+        return {'s': 'no_data'}
+    function, interval, series_key = SERIES_FUNCTIONS[resolution]
+
+    # compact returns only the latest 100 bars; ask for more only when needed
+    bars_wanted = (int(time.time()) - from_ts) // SERIES_STEP[resolution]
+    params = {'symbol': symbol, 'outputsize': 'full' if bars_wanted > COMPACT_BARS else 'compact'}
+    if interval:
+        params['interval'] = interval
+    data = get(function, params, queue_timeout)
+    if 'Error Message' in data:
+        # Unknown symbol or unsupported call
+        return {'s': 'no_data'}
+
+    bars = []
+    for key, values in (data.get(series_key) or {}).items():
+        ts = _bar_timestamp(key, interval is not None)
+        if from_ts <= ts <= to_ts:
+            bars.append((
+                ts,
+                _number(values.get('1. open')),
+                _number(values.get('2. high')),
+                _number(values.get('3. low')),
+                _number(values.get('4. close')),
+                _number(values.get('5. volume'))
+            ))
+    if not bars:
+        return {'s': 'no_data'}
+
+    bars.sort()
+    t, o, h, l, c, v = (list(column) for column in zip(*bars))
+    return {'s': 'ok', 't': t, 'o': o, 'h': h, 'l': l, 'c': c, 'v': v}
+
+
+def search(query, queue_timeout=None):
+    """Finnhub-shaped /search body, limited to US listings"""
+    matches = get('SYMBOL_SEARCH', {'keywords': query}, queue_timeout).get('bestMatches') or []
+    result = [
+        {
+            'symbol': match.get('1. symbol', ''),
+            'displaySymbol': match.get('1. symbol', ''),
+            'description': match.get('2. name', ''),
+            'type': match.get('3. type', '')
+        }
+        for match in matches
+        if match.get('4. region') == 'United States'
+    ]
+    return {'count': len(result), 'result': result}
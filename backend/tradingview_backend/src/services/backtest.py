@@ -0,0 +1,298 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.services.indicators import INDICATORS
+
+# Worker processes for multi-symbol sweeps; small sweeps run in-process
+BACKTEST_WORKERS = int(os.environ.get("BACKTEST_WORKERS", os.cpu_count() or 1))
+BACKTEST_PARALLEL_MIN_SYMBOLS = int(os.environ.get("BACKTEST_PARALLEL_MIN_SYMBOLS", 64))
+
+# Bars per year used to annualize Sharpe ratios
+PERIODS_PER_YEAR = {
+    '1': 252 * 390,
+    '5': 252 * 78,
+    '15': 252 * 26,
+    '30': 252 * 13,
+    '60': 252 * 7,
+    'D': 252,
+    'W': 52,
+    'M': 12
+}
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+_FIELD_KEYS = {'open': 'o', 'high': 'h', 'low': 'l', 'close': 'c', 'volume': 'v'}
+COMPARISONS = ('above', 'below', 'cross_above', 'cross_below')
+
+
+class RuleError(ValueError):
+    """A rule specification could not be understood"""
+
+
+# Rules are JSON objects compiled into nested tuples, which (unlike closures)
+# can be shipped to worker processes:
+#
+#   {"type": "price_above", "value": 200}          Alert-style threshold on close
+#   {"type": "price_below", "value": 150}           (inclusive: close >= / <= value)
+#   {"type": "above", "left": A, "right": B}        A > B on every bar
+#   {"type": "below" | "cross_above" | "cross_below", "left": A, "right": B}
+#   {"all": [rule, ...]}, {"any": [rule, ...]}, {"not": rule}
+#
+# where A and B are a number, a price field ("close", "high", ...) or an
+# indicator such as {"indicator": "sma", "period": 50} or
+# {"indicator": "macd", "output": "signal"}.
+
+def compile_rule(spec):
+    """Validate a rule specification and return its compiled form"""
+    if not isinstance(spec, dict):
+        raise RuleError('rule must be an object')
+    if 'all' in spec or 'any' in spec:
+        op = 'all' if 'all' in spec else 'any'
+        children = spec[op]
+        if not isinstance(children, list) or not children:
+            raise RuleError(f'{op} must be a non-empty list of rules')
+        return (op, tuple(compile_rule(child) for child in children))
+    if 'not' in spec:
+        return ('not', compile_rule(spec['not']))
+
+    kind = spec.get('type')
+    if kind in ('price_above', 'price_below'):
+        # Same semantics as an Alert's alert_type/target_value, which fire at >= and <=
+        op = 'at_or_above' if kind == 'price_above' else 'at_or_below'
+        return ('compare', op, ('field', 'close'), _compile_series(spec.get('value')))
+    if kind in COMPARISONS:
+        return ('compare', kind, _compile_series(spec.get('left')), _compile_series(spec.get('right')))
+    raise RuleError(f'unknown rule type: {kind!r}')
+
+
+def _compile_series(spec):
+    if isinstance(spec, bool) or spec is None:
+        raise RuleError('comparison operand is required')
+    if isinstance(spec, (int, float)):
+        return ('const', float(spec))
+    if isinstance(spec, str):
+        if spec not in PRICE_FIELDS:
+            raise RuleError(f'unknown price field: {spec!r}')
+        return ('field', spec)
+    if isinstance(spec, dict) and 'indicator' in spec:
+        name = str(spec['indicator']).lower()
+        if name not in INDICATORS:
+            raise RuleError(f"indicator must be one of {', '.join(INDICATORS)}")
+        step, defaults = INDICATORS[name]
+        params = {}
+        for key, default in defaults.items():
+            value = spec.get(key, default)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise RuleError(f'{name} {key} must be a positive number')
+            params[key] = type(default)(value)
+        output = spec.get('output')
+        if output is not None:
+            outputs, _ = step(None, np.zeros(1), **params)
+            if output not in outputs:
+                raise RuleError(f"{name} output must be one of {', '.join(outputs)}")
+        return ('indicator', name, tuple(sorted(params.items())), output)
+    raise RuleError(f'invalid comparison operand: {spec!r}')
+
+
+def _series(node, bars, memo):
+    kind = node[0]
+    if kind == 'const':
+        return node[1]
+    if kind == 'field':
+        return bars[_FIELD_KEYS[node[1]]]
+
+    _, name, params, output = node
+    key = (name, params)
+    if key not in memo:
+        step, _ = INDICATORS[name]
+        memo[key], _ = step(None, bars['c'], **dict(params))
+    outputs = memo[key]
+    return outputs[output] if output is not None else next(iter(outputs.values()))
+
+
+def evaluate(rule, bars, memo=None):
+    """Boolean array: whether the compiled rule holds on each bar"""
+    memo = {} if memo is None else memo
+    kind = rule[0]
+    if kind == 'all':
+        return np.logical_and.reduce([evaluate(child, bars, memo) for child in rule[1]])
+    if kind == 'any':
+        return np.logical_or.reduce([evaluate(child, bars, memo) for child in rule[1]])
+    if kind == 'not':
+        return ~evaluate(rule[1], bars, memo)
+
+    _, op, left, right = rule
+    n = len(bars['c'])
+    a = np.broadcast_to(_series(left, bars, memo), (n,))
+    b = np.broadcast_to(_series(right, bars, memo), (n,))
+    # NaN (indicator warm-up) compares False, so rules never fire before it
+    with np.errstate(invalid='ignore'):
+        if op == 'above':
+            return a > b
+        if op == 'below':
+            return a < b
+        if op == 'at_or_above':
+            return a >= b
+        if op == 'at_or_below':
+            return a <= b
+        prev_a = np.r_[np.nan, a[:-1]]
+        prev_b = np.r_[np.nan, b[:-1]]
+        if op == 'cross_above':
+            return (a > b) & (prev_a <= prev_b)
+        return (a < b) & (prev_a >= prev_b)
+
+
+def rising_edges(condition):
+    """Indices where condition becomes true; a held condition fires once, like an alert"""
+    return np.flatnonzero(condition & ~np.r_[False, condition[:-1]])
+
+
+def positions(entry, exit):
+    """Long (1) / flat (0) position after each bar's close.
+
+    Enter when flat and entry holds, leave when exit holds (exit wins on
+    ties). Each bar's signal is forward filled to the next signal with an
+    index maximum-accumulate instead of a per-bar state machine.
+    """
+    n = len(entry)
+    signal = np.full(n, -1, dtype=np.int8)
+    signal[entry] = 1
+    signal[exit] = 0
+    index = np.where(signal >= 0, np.arange(n), -1)
+    np.maximum.accumulate(index, out=index)
+    held = np.where(index >= 0, signal[np.maximum(index, 0)], 0)
+    return held.astype(np.int8)
+
+
+def run_symbol(bars, rule, exit_rule=None, horizon=5, fee=0.0, periods_per_year=252, include_triggers=True):
+    """Backtest one symbol's bars (dict of t/o/h/l/c/v arrays)"""
+    close = bars['c']
+    n = len(close)
+    memo = {}
+    condition = evaluate(rule, bars, memo)
+    triggers = rising_edges(condition)
+
+    result = {
+        'bars': n,
+        'trigger_count': int(len(triggers)),
+        'first_trigger': int(bars['t'][triggers[0]]) if len(triggers) else None,
+        'last_trigger': int(bars['t'][triggers[-1]]) if len(triggers) else None
+    }
+    if include_triggers:
+        result['triggers'] = bars['t'][triggers].tolist()
+
+    # Forward return after each trigger; triggers too close to the end are skipped
+    scored = triggers[triggers + horizon < n]
+    if len(scored):
+        forward = close[scored + horizon] / close[scored] - 1
+        result['hit_rate'] = float(np.mean(forward > 0))
+        result['forward_return_mean'] = float(forward.mean())
+    else:
+        result['hit_rate'] = None
+        result['forward_return_mean'] = None
+
+    # Strategy: long while the rule holds, or until exit_rule fires when given
+    exit = evaluate(exit_rule, bars, memo) if exit_rule is not None else ~condition
+    held = positions(condition, exit)
+    result['strategy'] = _strategy_stats(close, held, fee, periods_per_year)
+    return result
+
+
+def _strategy_stats(close, held, fee, periods_per_year):
+    n = len(close)
+    if n < 2:
+        return {'trades': 0, 'win_rate': None, 'total_return': 0.0, 'max_drawdown': 0.0,
+                'sharpe': None, 'exposure': 0.0}
+
+    changes = np.diff(np.r_[0, held])
+    entries = np.flatnonzero(changes == 1)
+    exits = np.flatnonzero(changes == -1)
+    # A trade still open on the last bar is marked to market there
+    if len(exits) < len(entries):
+        exits = np.r_[exits, n - 1]
+
+    # Position decided at bar i's close earns bar i+1's return; fees per side
+    growth = np.r_[1.0, 1 + held[:-1] * (close[1:] / close[:-1] - 1)]
+    growth[entries] *= 1 - fee
+    growth[exits] *= 1 - fee
+    returns = growth - 1
+    equity = np.cumprod(growth)
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+
+    trade_returns = close[exits] / close[entries] * (1 - fee) ** 2 - 1
+    std = returns.std()
+    return {
+        'trades': int(len(entries)),
+        'win_rate': float(np.mean(trade_returns > 0)) if len(entries) else None,
+        'total_return': float(equity[-1] - 1),
+        'max_drawdown': float(drawdown.max()),
+        'sharpe': float(returns.mean() / std * math.sqrt(periods_per_year)) if std > 0 else None,
+        'exposure': float(held.mean())
+    }
+
+
+def _run_shard(shard, rule, exit_rule, options):
+    return {symbol: run_symbol(bars, rule, exit_rule, **options) for symbol, bars in shard}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # forkserver: never fork the threaded web process itself
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['numpy', 'src.services.backtest'])
+            _executor = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS, mp_context=context)
+        return _executor
+
+
+def run_sweep(series, rule, exit_rule=None, resolution='D', horizon=5, fee=0.0, include_triggers=True):
+    """Backtest compiled rules over {symbol: bars}, returning {symbol: result}.
+
+    Large sweeps are split into one shard per worker process; every shard
+    is independent NumPy work, so the sweep scales with cores.
+    """
+    options = {
+        'horizon': horizon,
+        'fee': fee,
+        'periods_per_year': PERIODS_PER_YEAR.get(resolution, 252),
+        'include_triggers': include_triggers
+    }
+    items = list(series.items())
+    if BACKTEST_WORKERS <= 1 or len(items) < BACKTEST_PARALLEL_MIN_SYMBOLS:
+        return _run_shard(items, rule, exit_rule, options)
+
+    shard_size = math.ceil(len(items) / BACKTEST_WORKERS)
+    executor = _get_executor()
+    futures = [
+        executor.submit(_run_shard, items[start:start + shard_size], rule, exit_rule, options)
+        for start in range(0, len(items), shard_size)
+    ]
+    results = {}
+    for future in futures:
+        results.update(future.result())
+    return results
+
+
+def summarize(results):
+    """Aggregate per-symbol results into sweep-wide statistics"""
+    triggered = [r for r in results.values() if r['trigger_count']]
+    scored = [r for r in results.values() if r['hit_rate'] is not None]
+    strategies = [r['strategy'] for r in results.values()]
+    traded = [s for s in strategies if s['trades']]
+    return {
+        'symbols': len(results),
+        'symbols_triggered': len(triggered),
+        'trigger_count': sum(r['trigger_count'] for r in results.values()),
+        'hit_rate': float(np.mean([r['hit_rate'] for r in scored])) if scored else None,
+        'forward_return_mean': float(np.mean([r['forward_return_mean'] for r in scored])) if scored else None,
+        'strategy_total_return_mean': float(np.mean([s['total_return'] for s in strategies])) if strategies else None,
+        'strategy_win_rate': float(np.mean([s['win_rate'] for s in traded])) if traded else None,
+        'strategy_trades': sum(s['trades'] for s in strategies)
+    }
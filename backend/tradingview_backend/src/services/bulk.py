@@ -0,0 +1,441 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.stock import Alert, Candle, CandleRange, ChangeLog, Watchlist, WatchlistItem, db
+from src.services import changes
+
+FORMATS = ('csv', 'ndjson')
+
+# Rows per executemany batch, and rows per transaction
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 5000))
+BULK_COMMIT_ROWS = int(os.environ.get("BULK_COMMIT_ROWS", 200000))
+
+# Keep IN (...) lists under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+CANDLE_COLUMNS = ('symbol', 'resolution', 'timestamp', 'open', 'high', 'low', 'close', 'volume')
+WATCHLIST_COLUMNS = ('user_id', 'watchlist', 'stock_symbol')
+ALERT_COLUMNS = (
+    'user_id', 'stock_symbol', 'alert_type', 'target_value', 'status', 'created_at', 'triggered_at'
+)
+
+CANDLE_RESOLUTIONS = ('1', '5', '15', '30', '60', 'D', 'W', 'M')
+
+# Longest gap between consecutive imported bars that still counts as one
+# continuous span: a long weekend for daily and intraday bars
+DAY = 86400
+CANDLE_MAX_GAP = {'W': 14 * DAY, 'M': 62 * DAY}
+CANDLE_DEFAULT_MAX_GAP = 4 * DAY
+ALERT_TYPES = ('price_above', 'price_below')
+ALERT_STATUSES = ('active', 'triggered', 'disabled')
+
+
+class BulkImportError(ValueError):
+    """A row could not be imported; rows committed before it are kept"""
+
+    def __init__(self, message, imported=0):
+        super().__init__(message)
+        self.imported = imported
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_rows(lines, fmt):
+    """Yield dicts from an iterable of CSV (header first) or NDJSON text lines"""
+    if fmt == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def encode(chunks, columns, fmt):
+    """Yield CSV (header first) or NDJSON text, one string per chunk of row tuples"""
+    if fmt == 'csv':
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(columns)
+        yield out.getvalue()
+        for chunk in chunks:
+            out.seek(0)
+            out.truncate()
+            writer.writerows(chunk)
+            yield out.getvalue()
+        return
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), separators=(',', ':')) + '\n' for row in chunk
+        )
+
+
+def _symbol(value):
+    symbol = str(value or '').strip().upper()
+    if not symbol or len(symbol) > 10:
+        raise ValueError(f'invalid symbol {value!r}')
+    return symbol
+
+
+def _choice(value, allowed, name):
+    if value not in allowed:
+        raise ValueError(f"{name} must be one of {', '.join(allowed)}")
+    return value
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _begin_immediate():
+    """Take SQLite's write lock now, unless the open transaction already holds it.
+
+    pysqlite only begins a (deferred) transaction at the first write, so
+    anything read before it, such as max(id), can change under us.
+    """
+    connection = db.session.connection().connection.driver_connection
+    if not connection.in_transaction:
+        connection.execute('BEGIN IMMEDIATE')
+
+
+def _import(rows, parse, write, finish=None):
+    """Parse rows, hand them to write(chunk) in batches and commit every BULK_COMMIT_ROWS.
+
+    finish() runs in the last transaction, after every row was written.
+
+    A bad row rolls back the open transaction and raises BulkImportError
+    naming its line; batches committed before it stay imported.
+    """
+    committed = 0
+    pending = 0
+    line = 0
+    try:
+        def parsed():
+            nonlocal line
+            for line, row in enumerate(rows, 1):
+                try:
+                    yield parse(row)
+                except KeyError as e:
+                    raise BulkImportError(f'row {line}: missing column {e}')
+                except (TypeError, ValueError, AttributeError) as e:
+                    raise BulkImportError(f'row {line}: {e}')
+
+        for chunk in chunked(parsed(), BULK_CHUNK_SIZE):
+            write(chunk)
+            pending += len(chunk)
+            if pending >= BULK_COMMIT_ROWS:
+                db.session.commit()
+                committed += pending
+                pending = 0
+        if finish is not None:
+            finish()
+        db.session.commit()
+        return committed + pending
+    except (csv.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        # Malformed input rather than a bad value
+        db.session.rollback()
+        raise BulkImportError(f'row {line + 1}: {e}', committed)
+    except BulkImportError as e:
+        db.session.rollback()
+        e.imported = committed
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+# Candles
+
+_CANDLE_UPSERT = (
+    f"INSERT INTO {Candle.__tablename__} ({', '.join(CANDLE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (symbol, resolution, timestamp) DO UPDATE SET "
+    "open = excluded.open, high = excluded.high, low = excluded.low, "
+    "close = excluded.close, volume = excluded.volume"
+)
+
+
+def _parse_candle(row):
+    return (
+        _symbol(row['symbol']),
+        _choice(str(row.get('resolution') or 'D'), CANDLE_RESOLUTIONS, 'resolution'),
+        int(row['timestamp']),
+        float(row['open']),
+        float(row['high']),
+        float(row['low']),
+        float(row['close']),
+        float(row['volume'])
+    )
+
+
+def import_candles(rows):
+    """Upsert OHLCV rows; returns {'rows', 'series'}.
+
+    Rows go to the DBAPI cursor's executemany as plain tuples, skipping ORM
+    and Core row processing. Once all rows are in, each imported series
+    extends its CandleRange with the continuous spans that touch it, so the
+    candle store does not fetch those bars again.
+    """
+    spans = {}
+
+    def write(chunk):
+        new = {}
+        for symbol, resolution, ts, *_ in chunk:
+            new.setdefault((symbol, resolution), []).append([ts, ts])
+        for key, bars in new.items():
+            spans[key] = _merge_spans(spans.get(key, []) + bars, _max_gap(key[1]))
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.executemany(_CANDLE_UPSERT, chunk)
+        finally:
+            cursor.close()
+
+    count = _import(rows, _parse_candle, write, finish=lambda: _extend_ranges(spans))
+    return {'rows': count, 'series': len(spans)}
+
+
+def _max_gap(resolution):
+    return CANDLE_MAX_GAP.get(resolution, CANDLE_DEFAULT_MAX_GAP)
+
+
+def _merge_spans(spans, max_gap):
+    """Sort [start, end] spans and join the ones at most max_gap apart"""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _extend_ranges(spans):
+    """Merge each series' imported spans into its CandleRange where they touch it.
+
+    A range covers one continuous run of bars, so spans separated from it
+    by a gap are left out; a series without a range takes its newest span.
+    """
+    if not spans:
+        return
+    # Hold the write lock from reading the ranges until they are written back
+    _begin_immediate()
+    held = {}
+    symbols = sorted({symbol for symbol, _ in spans})
+    for i in range(0, len(symbols), ID_CHUNK_SIZE):
+        held.update(
+            ((symbol, resolution), [start, end])
+            for symbol, resolution, start, end in db.session.execute(
+                select(CandleRange.symbol, CandleRange.resolution, CandleRange.start_ts, CandleRange.end_ts)
+                .where(CandleRange.symbol.in_(symbols[i:i + ID_CHUNK_SIZE]))
+            )
+        )
+
+    ranges = []
+    for (symbol, resolution), series_spans in spans.items():
+        max_gap = _max_gap(resolution)
+        current = held.get((symbol, resolution))
+        if current is None:
+            start, end = series_spans[-1]
+        else:
+            start, end = current
+            for span_start, span_end in series_spans:
+                if span_start - current[1] <= max_gap and current[0] - span_end <= max_gap:
+                    start, end = min(start, span_start), max(end, span_end)
+            if [start, end] == current:
+                continue
+        ranges.append({'symbol': symbol, 'resolution': resolution, 'start_ts': start, 'end_ts': end})
+
+    if ranges:
+        stmt = sqlite_insert(CandleRange.__table__)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['symbol', 'resolution'],
+            set_={
+                'start_ts': stmt.excluded.start_ts,
+                'end_ts': stmt.excluded.end_ts,
+                'updated_at': func.current_timestamp()
+            }
+        ), ranges)
+
+
+def export_candles(symbols=None, resolution=None, from_ts=None, to_ts=None):
+    """Yield chunks of candle row tuples in primary key order"""
+    stmt = select(*(Candle.__table__.c[column] for column in CANDLE_COLUMNS))
+    if resolution:
+        stmt = stmt.where(Candle.resolution == resolution)
+    if from_ts is not None:
+        stmt = stmt.where(Candle.timestamp >= from_ts)
+    if to_ts is not None:
+        stmt = stmt.where(Candle.timestamp <= to_ts)
+    stmt = stmt.order_by(Candle.symbol, Candle.resolution, Candle.timestamp)
+
+    # One index range scan per symbol rather than a giant IN (...)
+    for symbol_stmt in ([stmt.where(Candle.symbol == s) for s in symbols] if symbols else [stmt]):
+        result = db.session.execute(symbol_stmt.execution_options(yield_per=BULK_CHUNK_SIZE))
+        for partition in result.partitions():
+            yield partition
+
+
+# Watchlists
+
+def _parse_watchlist_row(row):
+    name = str(row['watchlist'] or '').strip()
+    if not name or len(name) > 100:
+        raise ValueError(f'invalid watchlist name {row["watchlist"]!r}')
+    symbol = row.get('stock_symbol')
+    return int(row['user_id']), name, _symbol(symbol) if symbol else None
+
+
+def import_watchlists(rows):
+    """Create watchlists by (user_id, name) and add their symbols, skipping ones already present.
+
+    Returns {'rows', 'watchlists_created', 'items_added'}. Every touched
+    watchlist gets one change-log entry, so delta sync clients pick it up.
+    """
+    totals = {'watchlists_created': 0, 'items_added': 0}
+
+    def write(chunk):
+        # Lock before looking anything up, so no other writer creates the same watchlists
+        _begin_immediate()
+        ids, created = _watchlist_ids({(user_id, name) for user_id, name, _ in chunk})
+        totals['watchlists_created'] += len(created)
+
+        wanted = {(ids[(user_id, name)], symbol) for user_id, name, symbol in chunk if symbol}
+        held = set()
+        watchlist_ids = sorted({watchlist_id for watchlist_id, _ in wanted})
+        for i in range(0, len(watchlist_ids), ID_CHUNK_SIZE):
+            held.update(db.session.execute(
+                select(WatchlistItem.watchlist_id, WatchlistItem.stock_symbol)
+                .where(WatchlistItem.watchlist_id.in_(watchlist_ids[i:i + ID_CHUNK_SIZE]))
+            ).tuples())
+        added = sorted(wanted - held)
+        if added:
+            db.session.execute(insert(WatchlistItem), [
+                {'watchlist_id': watchlist_id, 'stock_symbol': symbol} for watchlist_id, symbol in added
+            ])
+        totals['items_added'] += len(added)
+
+        touched = created | {watchlist_id for watchlist_id, _ in added}
+        if touched:
+            db.session.execute(insert(ChangeLog), [
+                {'user_id': user_id, 'entity': changes.WATCHLISTS, 'entity_id': watchlist_id, 'op': 'upsert'}
+                for (user_id, _), watchlist_id in ids.items() if watchlist_id in touched
+            ])
+
+    count = _import(rows, _parse_watchlist_row, write)
+    return {'rows': count, **totals}
+
+
+def _watchlist_ids(keys):
+    """Return ({(user_id, name): watchlist id}, ids created), creating missing watchlists.
+
+    Call with the write lock held (see _begin_immediate).
+    """
+    ids = {}
+    user_ids = sorted({user_id for user_id, _ in keys})
+    for i in range(0, len(user_ids), ID_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Watchlist.user_id, Watchlist.name, Watchlist.id)
+            .where(Watchlist.user_id.in_(user_ids[i:i + ID_CHUNK_SIZE]))
+            .order_by(Watchlist.id.desc())
+        )
+        # Descending, so the oldest of same-named watchlists wins
+        ids.update(((user_id, name), watchlist_id) for user_id, name, watchlist_id in rows)
+    ids = {key: ids[key] for key in keys if key in ids}
+
+    missing = sorted(keys - ids.keys())
+    if missing:
+        before = db.session.execute(select(func.max(Watchlist.id))).scalar() or 0
+        db.session.execute(insert(Watchlist), [{'user_id': user_id, 'name': name} for user_id, name in missing])
+        # We held the write lock since reading max(id), so everything above it is ours
+        for user_id, name, watchlist_id in db.session.execute(
+            select(Watchlist.user_id, Watchlist.name, Watchlist.id).where(Watchlist.id > before)
+        ):
+            if (user_id, name) in keys:
+                ids.setdefault((user_id, name), watchlist_id)
+    return ids, {ids[key] for key in missing}
+
+
+def export_watchlists(user_id=None):
+    """Yield chunks of (user_id, watchlist, stock_symbol); empty watchlists get one row without a symbol"""
+    stmt = (
+        select(Watchlist.user_id, Watchlist.name, WatchlistItem.stock_symbol)
+        .outerjoin(WatchlistItem, WatchlistItem.watchlist_id == Watchlist.id)
+        .order_by(Watchlist.user_id, Watchlist.id, WatchlistItem.id)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Watchlist.user_id == user_id)
+    result = db.session.execute(stmt.execution_options(yield_per=BULK_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield partition
+
+
+# Alerts
+
+def _parse_alert(row):
+    status = row.get('status') or 'active'
+    return {
+        'user_id': int(row.get('user_id') or 1),
+        'stock_symbol': _symbol(row['stock_symbol']),
+        'alert_type': _choice(row['alert_type'], ALERT_TYPES, 'alert_type'),
+        'target_value': float(row['target_value']),
+        'status': _choice(status, ALERT_STATUSES, 'status'),
+        'created_at': _datetime(row.get('created_at')) or datetime.utcnow(),
+        'triggered_at': _datetime(row.get('triggered_at'))
+    }
+
+
+def import_alerts(rows):
+    """Insert alerts with one executemany per batch; returns {'rows'}.
+
+    The change log gets one entry per new alert via INSERT ... SELECT in
+    the same transaction. Callers should invalidate the alert index.
+    """
+    def write(chunk):
+        _begin_immediate()
+        before = db.session.execute(select(func.max(Alert.id))).scalar() or 0
+        db.session.execute(insert(Alert), chunk)
+        # We held the write lock since reading max(id), so everything above it is ours
+        db.session.execute(
+            insert(ChangeLog).from_select(
+                ['user_id', 'entity', 'entity_id', 'op'],
+                select(Alert.user_id, literal(changes.ALERTS), Alert.id, literal('upsert'))
+                .where(Alert.id > before)
+            )
+        )
+
+    return {'rows': _import(rows, _parse_alert, write)}
+
+
+def export_alerts(user_id=None, status=None):
+    """Yield chunks of alert row tuples in id order"""
+    stmt = select(*(Alert.__table__.c[column] for column in ALERT_COLUMNS)).order_by(Alert.id)
+    if user_id is not None:
+        stmt = stmt.where(Alert.user_id == user_id)
+    if status:
+        stmt = stmt.where(Alert.status == status)
+    result = db.session.execute(stmt.execution_options(yield_per=BULK_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield [row[:5] + (_iso(row[5]), _iso(row[6])) for row in partition]
+
+
+# kind -> (columns, export function, import function)
+KINDS = {
+    'candles': (CANDLE_COLUMNS, export_candles, import_candles),
+    'watchlists': (WATCHLIST_COLUMNS, export_watchlists, import_watchlists),
+    'alerts': (ALERT_COLUMNS, export_alerts, import_alerts)
+}
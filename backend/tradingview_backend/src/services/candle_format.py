@@ -0,0 +1,57 @@
+import gzip
+import json
+import numpy as np
+from flask import Response, request
+
+# Response formats accepted by the candle routes via ?format=
+CANDLE_FORMATS = ('json', 'columnar', 'binary')
+
+# Binary layout: one little-endian column after another, in this order
+BINARY_COLUMNS = (('t', '<i8'), ('o', '<f8'), ('h', '<f8'), ('l', '<f8'), ('c', '<f8'), ('v', '<f8'))
+
+# Bodies smaller than this are not worth the gzip CPU
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+
+
+def encode_columnar(symbol, resolution, data):
+    """JSON body with parallel t/o/h/l/c/v arrays and epoch-second timestamps"""
+    return json.dumps({
+        'symbol': symbol,
+        'resolution': resolution,
+        't': data['t'].tolist(),
+        'o': data['o'].tolist(),
+        'h': data['h'].tolist(),
+        'l': data['l'].tolist(),
+        'c': data['c'].tolist(),
+        'v': data['v'].tolist()
+    }, separators=(',', ':')).encode()
+
+
+def encode_binary(data):
+    """Packed columns: int64 timestamps followed by float64 o/h/l/c/v"""
+    return b''.join(
+        np.ascontiguousarray(data[key], dtype=dtype).tobytes() for key, dtype in BINARY_COLUMNS
+    )
+
+
+def candle_response(symbol, resolution, data, fmt):
+    """Build a columnar or binary candle response from t/o/h/l/c/v arrays, gzipped when the client accepts it"""
+    if fmt == 'binary':
+        body = encode_binary(data)
+        response = Response(body, mimetype='application/octet-stream')
+        response.headers['X-Candle-Symbol'] = symbol
+        response.headers['X-Candle-Resolution'] = resolution
+        response.headers['X-Candle-Count'] = str(len(data['t']))
+        response.headers['X-Candle-Columns'] = ','.join(
+            f"{key}:{np.dtype(dtype).name}" for key, dtype in BINARY_COLUMNS
+        )
+    else:
+        body = encode_columnar(symbol, resolution, data)
+        response = Response(body, mimetype='application/json')
+
+    response.vary.add('Accept-Encoding')
+    if len(body) >= GZIP_MIN_SIZE and 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.stock import Candle, CandleRange, db
+from src.services import market_data
+
+# Minimum seconds between upstream refreshes of the newest bars for a series
+CANDLE_REFRESH_INTERVAL = int(os.environ.get("CANDLE_REFRESH_INTERVAL", 60))
+
+# Striped per-series locks: a fixed table, so memory does not grow with the
+# number of symbols ever requested. They only serialize backfills within one
+# process; across workers the range upsert below keeps concurrent writers safe.
+SERIES_LOCK_STRIPES = 64
+_series_locks = [threading.Lock() for _ in range(SERIES_LOCK_STRIPES)]
+
+
+def _series_lock(symbol, resolution):
+    return _series_locks[hash((symbol, resolution)) % SERIES_LOCK_STRIPES]
+
+
+def get_candles(symbol, resolution, from_ts, to_ts):
+    """Return candles for [from_ts, to_ts] as parallel t/o/h/l/c/v lists.
+
+    Bars already held locally are served from the database; only the missing
+    head and tail of the requested range are fetched from upstream. Returns
+    None when nothing is available locally and upstream has no data.
+    """
+    with _series_lock(symbol, resolution):
+        try:
+            _backfill(symbol, resolution, from_ts, to_ts)
+        except market_data.UpstreamError:
+            # Serve whatever is already held while upstream is unhealthy
+            db.session.rollback()
+            data = read_candles(symbol, resolution, from_ts, to_ts)
+            if data is None:
+                raise
+            return data
+
+    return read_candles(symbol, resolution, from_ts, to_ts)
+
+
+def read_candles(symbol, resolution, from_ts, to_ts):
+    """Read stored candles for [from_ts, to_ts] as t/o/h/l/c/v arrays, without touching upstream"""
+    return read_candle_arrays([symbol], resolution, from_ts, to_ts).get(symbol)
+
+
+# Row layout produced by read_candle_arrays' cursor, one record per bar
+_CANDLE_DTYPE = np.dtype([
+    ('t', np.int64), ('o', np.float64), ('h', np.float64),
+    ('l', np.float64), ('c', np.float64), ('v', np.float64)
+])
+
+
+def read_candle_arrays(symbols, resolution, from_ts, to_ts):
+    """Read stored candles for many symbols as {symbol: {t, o, h, l, c, v arrays}}.
+
+    Rows go straight from the DBAPI cursor into a NumPy record array, which
+    is several times faster than building ORM rows for large sweeps. Each
+    symbol is an index range scan on the candle primary key. Symbols with no
+    stored bars in the range are left out.
+    """
+    sql = (
+        f"SELECT timestamp, open, high, low, close, volume FROM {Candle.__tablename__} "
+        "WHERE symbol = ? AND resolution = ? AND timestamp >= ? AND timestamp <= ? "
+        "ORDER BY timestamp"
+    )
+    series = {}
+    cursor = db.session.connection().connection.cursor()
+    try:
+        for symbol in symbols:
+            cursor.execute(sql, (symbol, resolution, from_ts, to_ts))
+            bars = np.fromiter(cursor, dtype=_CANDLE_DTYPE)
+            if len(bars):
+                series[symbol] = {field: bars[field] for field in _CANDLE_DTYPE.names}
+    finally:
+        cursor.close()
+    return series
+
+
+def load_candle_arrays(symbols, resolution, from_ts, to_ts, max_backfill=0):
+    """read_candle_arrays, first fetching up to max_backfill symbols that have no stored bars.
+
+    Lets small ad-hoc requests work on a cold database without letting a
+    large one turn into hundreds of upstream calls. Raises UpstreamError
+    only when upstream fails and nothing at all is available.
+    """
+    series = read_candle_arrays(symbols, resolution, from_ts, to_ts)
+    missing = [symbol for symbol in symbols if symbol not in series][:max_backfill]
+    fetched = []
+    for symbol in missing:
+        try:
+            get_candles(symbol, resolution, from_ts, to_ts)
+        except market_data.UpstreamError:
+            if not series and not fetched:
+                raise
+            break
+        fetched.append(symbol)
+    if fetched:
+        series.update(read_candle_arrays(fetched, resolution, from_ts, to_ts))
+    return series
+
+
+def _backfill(symbol, resolution, from_ts, to_ts):
+    held = db.session.get(CandleRange, (symbol, resolution))
+
+    if held is None:
+        if _fetch_and_store(symbol, resolution, from_ts, to_ts):
+            _extend_range(symbol, resolution, from_ts, to_ts)
+        db.session.commit()
+        return
+
+    if from_ts < held.start_ts:
+        if _fetch_and_store(symbol, resolution, from_ts, held.start_ts):
+            _extend_range(symbol, resolution, from_ts, held.start_ts)
+
+    if to_ts > held.end_ts and int(time.time()) - held.end_ts >= CANDLE_REFRESH_INTERVAL:
+        # Re-fetch from the newest stored bar so a still-forming bar is replaced
+        last_ts = db.session.execute(
+            select(db.func.max(Candle.timestamp)).where(
+                Candle.symbol == symbol, Candle.resolution == resolution
+            )
+        ).scalar()
+        tail_from = min(last_ts, held.end_ts) if last_ts is not None else held.end_ts
+        if _fetch_and_store(symbol, resolution, tail_from, to_ts):
+            _extend_range(symbol, resolution, tail_from, to_ts)
+
+    db.session.commit()
+
+
+def _extend_range(symbol, resolution, start_ts, end_ts):
+    """Widen the held range by a fetched span that touches it, creating it if needed.
+
+    An upsert rather than an ORM add/update: another worker may have written
+    the same range since it was read, and min/max merging makes that harmless.
+    """
+    table = CandleRange.__table__
+    stmt = sqlite_insert(table).values(
+        symbol=symbol, resolution=resolution, start_ts=start_ts, end_ts=end_ts
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol', 'resolution'],
+        set_={
+            'start_ts': db.func.min(table.c.start_ts, stmt.excluded.start_ts),
+            'end_ts': db.func.max(table.c.end_ts, stmt.excluded.end_ts),
+            # Column onupdate defaults are not applied to ON CONFLICT updates
+            'updated_at': db.func.current_timestamp()
+        }
+    )
+    db.session.execute(stmt)
+
+
+def _fetch_and_store(symbol, resolution, from_ts, to_ts):
+    """Fetch a range from upstream and upsert it. Returns False on failure"""
+    data = market_data.candles(symbol, resolution, from_ts, to_ts)
+
+    if not data or data.get("s") not in ("ok", "no_data"):
+        return False
+    if data["s"] == "no_data":
+        return True
+
+    store_candles(symbol, resolution, data)
+    return True
+
+
+def store_candles(symbol, resolution, data):
+    """Upsert Finnhub-shaped parallel arrays into the candle table"""
+    rows = [
+        {
+            'symbol': symbol,
+            'resolution': resolution,
+            'timestamp': int(ts),
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': v
+        }
+        for ts, o, h, l, c, v in zip(data["t"], data["o"], data["h"], data["l"], data["c"], data["v"])
+    ]
+
+    if not rows:
+        return
+
+    # executemany upsert: later fetches overwrite bars that were still forming
+    stmt = sqlite_insert(Candle.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol', 'resolution', 'timestamp'],
+        set_={
+            'open': stmt.excluded.open,
+            'high': stmt.excluded.high,
+            'low': stmt.excluded.low,
+            'close': stmt.excluded.close,
+            'volume': stmt.excluded.volume
+        }
+    )
+    db.session.execute(stmt, rows)
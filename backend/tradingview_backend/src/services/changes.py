@@ -0,0 +1,77 @@
+import hashlib
+from flask import Response, jsonify, request
+from sqlalchemy import func, select
+from src.models.stock import ChangeLog, db
+
+# Collections with a per-user change feed
+WATCHLISTS = 'watchlist'
+ALERTS = 'alert'
+
+# Keep IN (...) lists under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+
+def record(user_id, entity, entity_id, op='upsert'):
+    """Log a change; it is committed together with the caller's transaction"""
+    db.session.add(ChangeLog(user_id=int(user_id), entity=entity, entity_id=entity_id, op=op))
+
+
+def current_version(user_id, entity):
+    """Version of a user's collection: the id of its latest change, 0 if none"""
+    return db.session.execute(
+        select(func.max(ChangeLog.id)).where(ChangeLog.user_id == user_id, ChangeLog.entity == entity)
+    ).scalar() or 0
+
+
+def changes_since(user_id, entity, version):
+    """Return ({entity_id: last op}, latest version) for changes after version"""
+    rows = db.session.execute(
+        select(ChangeLog.id, ChangeLog.entity_id, ChangeLog.op)
+        .where(ChangeLog.user_id == user_id, ChangeLog.entity == entity, ChangeLog.id > version)
+        .order_by(ChangeLog.id)
+    ).all()
+    # Several changes to one entity collapse to its final state
+    latest = {entity_id: op for _, entity_id, op in rows}
+    return latest, rows[-1].id if rows else version
+
+
+def feed_response(user_id, entity, model, since_version, options=()):
+    """JSON change feed: entities created/updated and ids deleted after since_version"""
+    latest, version = changes_since(user_id, entity, since_version)
+    upsert_ids = [entity_id for entity_id, op in latest.items() if op == 'upsert']
+    rows = []
+    for i in range(0, len(upsert_ids), ID_CHUNK_SIZE):
+        rows.extend(
+            model.query.options(*options)
+            .filter(model.id.in_(upsert_ids[i:i + ID_CHUNK_SIZE]))
+            .all()
+        )
+    rows.sort(key=lambda row: row.id)
+    # Anything changed but no longer present was deleted in the meantime
+    present = {row.id for row in rows}
+    return jsonify({
+        'version': version,
+        'upserts': [row.to_dict() for row in rows],
+        'deletes': sorted(entity_id for entity_id in latest if entity_id not in present)
+    })
+
+
+def collection_etag(user_id, entity, version):
+    """Strong ETag for one view (query string) of a user's collection at version"""
+    view = hashlib.sha1(request.query_string).hexdigest()[:12]
+    return f'{entity}-{user_id}-{version}-{view}'
+
+
+def not_modified(etag, version):
+    """304 if the client already holds this version, else None"""
+    if etag in request.if_none_match:
+        return versioned(Response(status=304), etag, version)
+    return None
+
+
+def versioned(response, etag, version):
+    response.set_etag(etag)
+    response.headers['X-Data-Version'] = str(version)
+    # Browsers revalidate with If-None-Match on every fetch instead of refetching
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
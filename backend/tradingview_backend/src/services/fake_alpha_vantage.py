@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from src.services import alpha_vantage
+from src.services.fake_finnhub import (
+    FakeFinnhubAdapter, SEARCH_UNIVERSE, synthetic_candles, synthetic_quote
+)
+
+# Output size of the real API: compact is the latest 100 bars
+COMPACT_BARS = 100
+# Bars generated for outputsize=full, per resolution
+FULL_SPAN_SECONDS = {
+    'TIME_SERIES_INTRADAY': 30 * 86400,
+    'TIME_SERIES_DAILY': 20 * 365 * 86400,
+    'TIME_SERIES_WEEKLY': 20 * 365 * 86400,
+    'TIME_SERIES_MONTHLY': 20 * 365 * 86400
+}
+# (function, interval) -> Finnhub resolution of the synthetic series
+RESOLUTIONS = {
+    (function, interval): resolution
+    for resolution, (function, interval, _) in alpha_vantage.SERIES_FUNCTIONS.items()
+}
+
+
+def _series_key(ts, intraday):
+    if intraday:
+        return datetime.fromtimestamp(ts, alpha_vantage.EXCHANGE_TZ).strftime('%Y-%m-%d %H:%M:%S')
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _global_quote(symbol):
+    quote = synthetic_quote(symbol)
+    return {'Global Quote': {
+        '01. symbol': symbol,
+        '02. open': f"{quote['o']:.4f}",
+        '03. high': f"{quote['h']:.4f}",
+        '04. low': f"{quote['l']:.4f}",
+        '05. price': f"{quote['c']:.4f}",
+        '06. volume': '1000000',
+        '07. latest trading day': _series_key(quote['t'], False),
+        '08. previous close': f"{quote['pc']:.4f}",
+        '09. change': f"{quote['d']:.4f}",
+        '10. change percent': f"{quote['dp']:.4f}%"
+    }}
+
+
+def _time_series(function, params):
+    interval = params.get('interval') if function == 'TIME_SERIES_INTRADAY' else None
+    resolution = RESOLUTIONS.get((function, interval))
+    if resolution is None:
+        return {'Error Message': 'Invalid API call.'}
+    _, _, series_key = alpha_vantage.SERIES_FUNCTIONS[resolution]
+
+    now = int(datetime.now(timezone.utc).timestamp())
+    data = synthetic_candles(params.get('symbol', '').upper(), resolution, now - FULL_SPAN_SECONDS[function], now)
+    if data['s'] != 'ok':
+        return {'Error Message': 'Invalid API call.'}
+
+    bars = list(zip(data['t'], data['o'], data['h'], data['l'], data['c'], data['v']))
+    if params.get('outputsize', 'compact') == 'compact':
+        bars = bars[-COMPACT_BARS:]
+    # Newest first, like the real API
+    return {
+        'Meta Data': {'2. Symbol': params.get('symbol', '')},
+        series_key: {
+            _series_key(ts, interval is not None): {
+                '1. open': f'{o:.4f}',
+                '2. high': f'{h:.4f}',
+                '3. low': f'{l:.4f}',
+                '4. close': f'{c:.4f}',
+                '5. volume': str(v)
+            }
+            for ts, o, h, l, c, v in reversed(bars)
+        }
+    }
+
+
+def handle(params):
+    """Return (status, body) for Alpha Vantage query params"""
+    function = params.get('function', '')
+    if function == 'GLOBAL_QUOTE':
+        return 200, _global_quote(params.get('symbol', '').upper())
+    if function.startswith('TIME_SERIES_'):
+        return 200, _time_series(function, params)
+    if function == 'SYMBOL_SEARCH':
+        keywords = params.get('keywords', '').upper()
+        return 200, {'bestMatches': [
+            {'1. symbol': symbol, '2. name': name, '3. type': 'Equity', '4. region': 'United States'}
+            for symbol, name in SEARCH_UNIVERSE
+            if keywords in symbol or keywords in name
+        ]}
+    return 200, {'Error Message': 'Invalid API call.'}
+
+
+class FakeAlphaVantageAdapter(FakeFinnhubAdapter):
+    """requests transport answering Alpha Vantage calls from the same synthetic data as the Finnhub fake"""
+
+    def respond(self, path, params):
+        return handle(params)
@@ -0,0 +1,163 @@
+import json
+import math
+import random
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+# Bar width in seconds for each Finnhub resolution
+RESOLUTION_SECONDS = {
+    '1': 60,
+    '5': 300,
+    '15': 900,
+    '30': 1800,
+    '60': 3600,
+    'D': 86400,
+    'W': 604800,
+    'M': 2592000
+}
+
+# Small fixed universe used to answer /search
+SEARCH_UNIVERSE = [
+    ('AAPL', 'APPLE INC'),
+    ('AMZN', 'AMAZON.COM INC'),
+    ('GOOGL', 'ALPHABET INC-CL A'),
+    ('META', 'META PLATFORMS INC-CLASS A'),
+    ('MSFT', 'MICROSOFT CORP'),
+    ('NFLX', 'NETFLIX INC'),
+    ('NVDA', 'NVIDIA CORP'),
+    ('TSLA', 'TESLA INC')
+]
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode())
+
+
+def synthetic_price(symbol, ts):
+    """Deterministic price for symbol at UNIX time ts"""
+    seed = _seed(symbol)
+    base = 20 + seed % 480
+    trend = 0.15 * math.sin(ts / 2_592_000 + seed % 7)
+    noise = random.Random(seed ^ int(ts)).uniform(-0.01, 0.01)
+    return round(base * (1 + trend + noise), 2)
+
+
+def synthetic_quote(symbol):
+    now = int(time.time())
+    previous_close = synthetic_price(symbol, now - now % 86400 - 86400)
+    price = synthetic_price(symbol, now - now % 60)
+    return {
+        'c': price,
+        'd': round(price - previous_close, 2),
+        'dp': round((price - previous_close) / previous_close * 100, 4),
+        'h': round(max(price, previous_close) * 1.01, 2),
+        'l': round(min(price, previous_close) * 0.99, 2),
+        'o': previous_close,
+        'pc': previous_close,
+        't': now
+    }
+
+
+def synthetic_candles(symbol, resolution, from_ts, to_ts):
+    step = RESOLUTION_SECONDS.get(resolution)
+    if step is None:
+        return {'s': 'no_data'}
+
+    t, o, h, l, c, v = [], [], [], [], [], []
+    seed = _seed(symbol)
+    ts = from_ts - from_ts % step
+    if ts < from_ts:
+        ts += step
+    while ts <= to_ts:
+        # Daily and finer bars skip weekends like a real exchange calendar
+        if step > 86400 or time.gmtime(ts).tm_wday < 5:
+            open_price = synthetic_price(symbol, ts)
+            close_price = synthetic_price(symbol, ts + step)
+            t.append(ts)
+            o.append(open_price)
+            c.append(close_price)
+            h.append(round(max(open_price, close_price) * 1.005, 2))
+            l.append(round(min(open_price, close_price) * 0.995, 2))
+            v.append(random.Random(seed + ts).randint(10_000, 5_000_000))
+        ts += step
+
+    if not t:
+        return {'s': 'no_data'}
+    return {'s': 'ok', 't': t, 'o': o, 'h': h, 'l': l, 'c': c, 'v': v}
+
+
+def synthetic_search(query):
+    query = query.upper()
+    result = [
+        {'symbol': symbol, 'displaySymbol': symbol, 'description': name, 'type': 'Common Stock'}
+        for symbol, name in SEARCH_UNIVERSE
+        if query in symbol or query in name
+    ]
+    return {'count': len(result), 'result': result}
+
+
+def handle(path, params):
+    """Return (status, body) for a Finnhub API path and flat query params"""
+    if path.endswith('/quote'):
+        return 200, synthetic_quote(params.get('symbol', '').upper())
+    if path.endswith('/stock/candle'):
+        return 200, synthetic_candles(
+            params.get('symbol', '').upper(),
+            params.get('resolution', 'D'),
+            int(params.get('from', 0)),
+            int(params.get('to', 0))
+        )
+    if path.endswith('/search'):
+        return 200, synthetic_search(params.get('q', ''))
+    if path.endswith('/stock/symbol'):
+        return 200, [
+            {'symbol': symbol, 'displaySymbol': symbol, 'description': name, 'type': 'Common Stock'}
+            for symbol, name in SEARCH_UNIVERSE
+        ]
+    return 404, {'error': 'Unknown endpoint'}
+
+
+class FakeFinnhubAdapter(BaseAdapter):
+    """requests transport that answers Finnhub calls with synthetic data.
+
+    Mounted on the shared session when FINNHUB_FAKE is set, so the whole
+    client stack (rate limiting, retries, circuit breaker) runs without
+    network access. ``latency`` delays each response and ``error_rate``
+    fails that fraction of calls with ``error_status``.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=429):
+        super().__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlsplit(request.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if self.error_rate and random.random() < self.error_rate:
+            status, body = self.error_status, {'error': 'Injected failure'}
+        else:
+            status, body = self.respond(url.path, params)
+
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def respond(self, path, params):
+        return handle(path, params)
+
+    def close(self):
+        pass
@@ -0,0 +1,133 @@
+import os
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from src.services import metrics
+from src.services.resilience import (
+    CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket, UpstreamError, current_priority
+)
+
+# Finnhub API configuration
+FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY")
+FINNHUB_BASE_URL = os.environ.get("FINNHUB_BASE_URL", "https://finnhub.io/api/v1")
+
+# Maximum number of keep-alive connections held open to Finnhub
+FINNHUB_POOL_SIZE = int(os.environ.get("FINNHUB_POOL_SIZE", 8))
+
+# Rate limiting: sustained calls per minute and burst size
+FINNHUB_RATE_LIMIT = float(os.environ.get("FINNHUB_RATE_LIMIT", 60))
+FINNHUB_BURST = int(os.environ.get("FINNHUB_BURST", 10))
+# Seconds a call may wait for a rate-limit token before giving up
+FINNHUB_QUEUE_TIMEOUT = float(os.environ.get("FINNHUB_QUEUE_TIMEOUT", 10))
+
+# Timeouts (seconds) and retry policy
+FINNHUB_CONNECT_TIMEOUT = float(os.environ.get("FINNHUB_CONNECT_TIMEOUT", 3))
+FINNHUB_READ_TIMEOUT = float(os.environ.get("FINNHUB_READ_TIMEOUT", 5))
+FINNHUB_MAX_RETRIES = int(os.environ.get("FINNHUB_MAX_RETRIES", 2))
+FINNHUB_BACKOFF_BASE = float(os.environ.get("FINNHUB_BACKOFF_BASE", 0.5))
+FINNHUB_BACKOFF_MAX = float(os.environ.get("FINNHUB_BACKOFF_MAX", 8))
+
+# Circuit breaker: consecutive failures to open, seconds before a trial call
+FINNHUB_BREAKER_THRESHOLD = int(os.environ.get("FINNHUB_BREAKER_THRESHOLD", 5))
+FINNHUB_BREAKER_RESET = float(os.environ.get("FINNHUB_BREAKER_RESET", 30))
+
+# Serve synthetic data from an in-process fake instead of the real API
+FINNHUB_FAKE = os.environ.get("FINNHUB_FAKE", "false").lower() == "true"
+# Seconds the fake waits before answering, to exercise hedging and timeouts
+FINNHUB_FAKE_LATENCY = float(os.environ.get("FINNHUB_FAKE_LATENCY", 0))
+
+
+# Shared session so every request reuses pooled keep-alive connections
+# instead of paying a new TCP/TLS handshake per call
+session = requests.Session()
+if FINNHUB_FAKE:
+    from src.services.fake_finnhub import FakeFinnhubAdapter
+    _adapter = FakeFinnhubAdapter(latency=FINNHUB_FAKE_LATENCY)
+else:
+    _adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FINNHUB_POOL_SIZE)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+rate_limiter = TokenBucket(rate=FINNHUB_RATE_LIMIT / 60.0, capacity=FINNHUB_BURST)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=FINNHUB_BREAKER_THRESHOLD,
+    reset_timeout=FINNHUB_BREAKER_RESET
+)
+
+
+def get(path, params=None, queue_timeout=None):
+    """GET a Finnhub endpoint and return the decoded JSON body.
+
+    Calls are admitted by the shared token bucket in priority order, retried
+    with jittered exponential backoff on timeouts, 429s and 5xx responses,
+    and refused outright while the circuit breaker is open. queue_timeout
+    overrides how long to wait for a token (0: fail at once if none is free).
+    """
+    if queue_timeout is None:
+        queue_timeout = FINNHUB_QUEUE_TIMEOUT
+    params = dict(params or {})
+    params['token'] = FINNHUB_API_KEY
+
+    if not circuit_breaker.allow():
+        metrics.upstream_rejections.inc(endpoint=path, reason='circuit_open')
+        raise CircuitOpenError('Market data provider is temporarily unavailable', status=503)
+
+    error = None
+    for attempt in range(FINNHUB_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(_backoff(attempt, error))
+
+        if not rate_limiter.acquire(current_priority(), timeout=queue_timeout):
+            # Our own budget is exhausted; the upstream itself is not at fault
+            circuit_breaker.release()
+            metrics.upstream_rejections.inc(endpoint=path, reason='rate_limited')
+            raise RateLimitedError('Market data rate limit reached, try again shortly', status=429)
+
+        started = time.perf_counter()
+        try:
+            response = session.get(
+                f"{FINNHUB_BASE_URL}{path}",
+                params=params,
+                timeout=(FINNHUB_CONNECT_TIMEOUT, FINNHUB_READ_TIMEOUT)
+            )
+        except requests.RequestException as e:
+            # Connection errors, timeouts and bodies cut off mid-read alike
+            metrics.upstream_duration.observe(time.perf_counter() - started, endpoint=path)
+            metrics.upstream_requests.inc(endpoint=path, status=type(e).__name__)
+            error = UpstreamError(f'Market data provider unreachable: {e}', status=504)
+            continue
+        metrics.upstream_duration.observe(time.perf_counter() - started, endpoint=path)
+        metrics.upstream_requests.inc(endpoint=path, status=response.status_code)
+
+        if response.status_code == 429:
+            error = RateLimitedError('Market data rate limit reached, try again shortly', status=429)
+            error.retry_after = response.headers.get('Retry-After')
+            continue
+        if response.status_code >= 500:
+            error = UpstreamError(f'Market data provider error ({response.status_code})', status=502)
+            continue
+        if response.status_code < 400:
+            try:
+                body = response.json()
+            except ValueError:
+                error = UpstreamError('Market data provider sent an invalid response', status=502)
+                continue
+
+        circuit_breaker.record_success()
+        if response.status_code >= 400:
+            raise UpstreamError(
+                f'Market data request rejected ({response.status_code})', status=502
+            )
+        return body
+
+    circuit_breaker.record_failure()
+    raise error
+
+
+def _backoff(attempt, error):
+    """Full-jitter exponential backoff, honouring Retry-After when given"""
+    retry_after = error.retry_after
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), FINNHUB_BACKOFF_MAX)
+    return random.uniform(0, min(FINNHUB_BACKOFF_MAX, FINNHUB_BACKOFF_BASE * 2 ** attempt))
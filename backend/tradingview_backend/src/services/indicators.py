@@ -0,0 +1,205 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def ema_from(x, alpha, prev=None):
+    """Exponential moving average of x continuing from prev (seeded by x[0]).
+
+    Uses the closed form ema[k] = b^(k+1) * (prev + a * sum_j x[j] / b^(j+1))
+    with b = 1 - a, evaluated with cumsum in chunks short enough that b^k
+    never underflows, so there is no per-element Python loop.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty(len(x))
+    if len(x) == 0:
+        return out
+    if prev is None:
+        prev = x[0]
+    beta = 1.0 - alpha
+    if beta <= 0.0:
+        out[:] = x
+        return out
+
+    chunk = max(1, int(-200 / np.log10(beta)))
+    for start in range(0, len(x), chunk):
+        segment = x[start:start + chunk]
+        powers = beta ** np.arange(1, len(segment) + 1)
+        values = powers * (prev + alpha * np.cumsum(segment / powers))
+        out[start:start + len(segment)] = values
+        prev = values[-1]
+    return out
+
+
+def _rolling_mean(x, period):
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        sums = np.cumsum(np.r_[0.0, x])
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def _rolling_std(x, period):
+    out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        out[period - 1:] = sliding_window_view(x, period).std(axis=1)
+    return out
+
+
+# Each step function takes (state, closes, **params) and returns
+# ({output: values aligned with closes}, new_state). A state of None means
+# "no history yet", so a full computation is just step(None, closes).
+
+def sma_step(state, close, period):
+    history = state if state is not None else np.empty(0)
+    buffer = np.r_[history, close]
+    values = _rolling_mean(buffer, period)[len(history):]
+    return {'sma': values}, buffer[len(buffer) - (period - 1):] if period > 1 else np.empty(0)
+
+
+def ema_step(state, close, period):
+    values = ema_from(close, 2.0 / (period + 1), state)
+    return {'ema': values}, values[-1] if len(values) else state
+
+
+def bollinger_step(state, close, period, stddev):
+    history = state if state is not None else np.empty(0)
+    buffer = np.r_[history, close]
+    middle = _rolling_mean(buffer, period)[len(history):]
+    width = stddev * _rolling_std(buffer, period)[len(history):]
+    new_state = buffer[len(buffer) - (period - 1):] if period > 1 else np.empty(0)
+    return {'middle': middle, 'upper': middle + width, 'lower': middle - width}, new_state
+
+
+def macd_step(state, close, fast, slow, signal):
+    fast_prev, slow_prev, signal_prev = state if state is not None else (None, None, None)
+    fast_ema = ema_from(close, 2.0 / (fast + 1), fast_prev)
+    slow_ema = ema_from(close, 2.0 / (slow + 1), slow_prev)
+    macd = fast_ema - slow_ema
+    signal_line = ema_from(macd, 2.0 / (signal + 1), signal_prev)
+    if len(close):
+        state = (fast_ema[-1], slow_ema[-1], signal_line[-1])
+    return {'macd': macd, 'signal': signal_line, 'histogram': macd - signal_line}, state
+
+
+def rsi_step(state, close, period):
+    """Wilder's RSI; state is (avg_gain, avg_loss, last_close) once warmed up"""
+    close = np.asarray(close, dtype=np.float64)
+    if state is None or isinstance(state, np.ndarray):
+        # Not warmed up yet: recompute over every close seen so far
+        history = state if state is not None else np.empty(0)
+        buffer = np.r_[history, close]
+        values = np.full(len(buffer), np.nan)
+        if len(buffer) <= period:
+            return {'rsi': values[len(history):]}, buffer
+
+        deltas = np.diff(buffer)
+        gains = np.clip(deltas, 0, None)
+        losses = np.clip(-deltas, 0, None)
+        avg_gain = ema_from(gains[period:], 1.0 / period, gains[:period].mean())
+        avg_loss = ema_from(losses[period:], 1.0 / period, losses[:period].mean())
+        avg_gain = np.r_[gains[:period].mean(), avg_gain]
+        avg_loss = np.r_[losses[:period].mean(), avg_loss]
+        values[period:] = _rsi(avg_gain, avg_loss)
+        return {'rsi': values[len(history):]}, (avg_gain[-1], avg_loss[-1], buffer[-1])
+
+    avg_gain_prev, avg_loss_prev, last_close = state
+    if len(close) == 0:
+        return {'rsi': np.empty(0)}, state
+    deltas = np.diff(np.r_[last_close, close])
+    avg_gain = ema_from(np.clip(deltas, 0, None), 1.0 / period, avg_gain_prev)
+    avg_loss = ema_from(np.clip(-deltas, 0, None), 1.0 / period, avg_loss_prev)
+    return {'rsi': _rsi(avg_gain, avg_loss)}, (avg_gain[-1], avg_loss[-1], close[-1])
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+
+
+# name -> (step function, default parameters)
+INDICATORS = {
+    'sma': (sma_step, {'period': 20}),
+    'ema': (ema_step, {'period': 20}),
+    'rsi': (rsi_step, {'period': 14}),
+    'macd': (macd_step, {'fast': 12, 'slow': 26, 'signal': 9}),
+    'bollinger': (bollinger_step, {'period': 20, 'stddev': 2.0})
+}
+
+
+class _Entry:
+    __slots__ = ('t', 'values', 'state')
+
+    def __init__(self, t, values, state):
+        self.t = t
+        self.values = values
+        self.state = state
+
+
+class IndicatorCache:
+    """Memoized indicator series keyed by (symbol, resolution, indicator, params).
+
+    An entry holds the last requested window only, plus the rolling state as
+    of its second-to-last bar (the newest bar may still be forming). A request
+    whose window starts on the same bar only pushes the bars from that point
+    on through the step function; one starting elsewhere is recomputed, since
+    EMA-seeded indicators depend on the window's first bar. Either way the
+    result equals a full computation over the window, and entries never grow
+    past the window.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def compute(self, key, name, params, t, close):
+        """Return (t, {output: values}) for the candles t/close"""
+        step, _ = INDICATORS[name]
+        t = np.asarray(t, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+        if len(t) == 0:
+            return t, {}
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        start = None
+        if entry is not None and t[0] == entry.t[0]:
+            start = int(np.searchsorted(t, entry.t[-1]))
+            if start >= len(t) or t[start] != entry.t[-1]:
+                start = None
+
+        if start is None:
+            self.misses += 1
+            # Full computation over the window
+            head_values, state = step(None, close[:-1], **params)
+            tail_values, _ = step(state, close[-1:], **params)
+            values = {k: np.r_[head_values[k], tail_values[k]] for k in tail_values}
+        else:
+            self.hits += 1
+            # Incremental: redo the held-back bar, then append the new ones
+            segment = close[start:]
+            head_values, state = step(entry.state, segment[:-1], **params)
+            tail_values, _ = step(state, segment[-1:], **params)
+            values = {
+                k: np.r_[entry.values[k][:start], head_values[k], tail_values[k]]
+                for k in tail_values
+            }
+
+        with self._lock:
+            self._entries[key] = _Entry(t, values, state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return t, values
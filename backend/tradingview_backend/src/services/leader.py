@@ -0,0 +1,46 @@
+import logging
+import os
+import threading
+
+try:
+    import fcntl  # POSIX only; elsewhere every process leads (fine for the dev server)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """Elect one process per host to run work that must not be repeated per worker.
+
+    Every process waits on an exclusive flock of the same file from a daemon
+    thread; the holder keeps the file open for the rest of its life, and the
+    kernel drops the lock when it exits, so another waiting process takes over
+    when the leader is recycled or crashes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_leader = False
+        self._file = None
+        self._thread = None
+
+    def run_when_leader(self, callback):
+        """Call callback (once, from a background thread) when this process becomes leader"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._wait, args=(callback,), name='leader-election', daemon=True
+            )
+            self._thread.start()
+
+    def _wait(self, callback):
+        if fcntl is not None:
+            self._file = open(self.path, 'a+')
+            # Blocks until the current leader (if any) exits
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        self.is_leader = True
+        logger.info('Process %s is running the shared background services', os.getpid())
+        try:
+            callback()
+        except Exception:
+            logger.exception('Starting the shared background services failed')
@@ -0,0 +1,227 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src.services import alpha_vantage, finnhub, metrics
+from src.services.resilience import INTERACTIVE, CircuitOpenError, UpstreamError, current_priority
+
+# Providers in order of preference; the first one is the home provider
+MARKET_DATA_PROVIDERS = [
+    name.strip() for name in os.environ.get("MARKET_DATA_PROVIDERS", "finnhub,alphavantage").split(',')
+    if name.strip()
+]
+# Interactive calls fire the next provider when the current one has not answered within this many seconds
+MARKET_DATA_HEDGE_DELAY = float(os.environ.get("MARKET_DATA_HEDGE_DELAY", 0.5))
+MARKET_DATA_HEDGING = os.environ.get("MARKET_DATA_HEDGING", "true").lower() == "true"
+# Threads running provider calls; each hedged call can hold two
+MARKET_DATA_WORKERS = int(os.environ.get("MARKET_DATA_WORKERS", 32))
+# Weight of the newest sample in the moving averages used for routing
+MARKET_DATA_EWMA_ALPHA = float(os.environ.get("MARKET_DATA_EWMA_ALPHA", 0.2))
+
+
+class ProviderStats:
+    """Moving averages of one provider's latency and failure rate"""
+
+    def __init__(self, alpha=MARKET_DATA_EWMA_ALPHA):
+        self.alpha = alpha
+        self.latency = None
+        self.failure_rate = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.failure_rate += self.alpha * ((0.0 if ok else 1.0) - self.failure_rate)
+            # Only answers say how fast a provider is; a quick error is not
+            if ok:
+                self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+
+    def score(self):
+        """Expected seconds per successful call; unmeasured providers sort last"""
+        with self._lock:
+            if self.latency is None:
+                return float('inf')
+            return self.latency / max(1.0 - self.failure_rate, 0.05)
+
+
+class Provider:
+    """A market data source answering with Finnhub-shaped bodies.
+
+    Adapters implement any of quote, candles, search and symbols; each takes
+    a queue_timeout keyword bounding how long to wait for rate-limit tokens.
+    """
+
+    name = None
+    methods = ()
+
+    def __init__(self):
+        self.stats = ProviderStats()
+
+    def available(self):
+        return True
+
+    def call(self, method, args, queue_timeout=None):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = getattr(self, method)(*args, queue_timeout=queue_timeout)
+            ok = True
+            return result
+        except CircuitOpenError:
+            # Refused without a call: says nothing new about the provider
+            raise
+        except UpstreamError:
+            self.stats.record(time.perf_counter() - started, False)
+            raise
+        finally:
+            if ok:
+                self.stats.record(time.perf_counter() - started, True)
+            metrics.provider_requests.inc(provider=self.name, method=method, outcome='ok' if ok else 'error')
+            if self.stats.latency is not None:
+                metrics.provider_latency.set(self.stats.latency, provider=self.name)
+
+
+class FinnhubProvider(Provider):
+    name = 'finnhub'
+    methods = ('quote', 'candles', 'search', 'symbols')
+
+    def available(self):
+        return finnhub.circuit_breaker.state != finnhub.circuit_breaker.OPEN
+
+    def quote(self, symbol, queue_timeout=None):
+        return finnhub.get('/quote', {'symbol': symbol}, queue_timeout)
+
+    def candles(self, symbol, resolution, from_ts, to_ts, queue_timeout=None):
+        return finnhub.get('/stock/candle', {
+            'symbol': symbol,
+            'resolution': resolution,
+            'from': from_ts,
+            'to': to_ts
+        }, queue_timeout)
+
+    def search(self, query, queue_timeout=None):
+        return finnhub.get('/search', {'q': query}, queue_timeout)
+
+    def symbols(self, exchange, queue_timeout=None):
+        return finnhub.get('/stock/symbol', {'exchange': exchange}, queue_timeout)
+
+
+class AlphaVantageProvider(Provider):
+    name = 'alphavantage'
+    # No full symbol list: LISTING_STATUS is CSV and lacks the fields we keep
+    methods = ('quote', 'candles', 'search')
+
+    def available(self):
+        return alpha_vantage.circuit_breaker.state != alpha_vantage.circuit_breaker.OPEN
+
+    def quote(self, symbol, queue_timeout=None):
+        return alpha_vantage.quote(symbol, queue_timeout)
+
+    def candles(self, symbol, resolution, from_ts, to_ts, queue_timeout=None):
+        return alpha_vantage.candles(symbol, resolution, from_ts, to_ts, queue_timeout)
+
+    def search(self, query, queue_timeout=None):
+        return alpha_vantage.search(query, queue_timeout)
+
+
+def _configured_providers():
+    known = {'finnhub': FinnhubProvider, 'alphavantage': AlphaVantageProvider}
+    providers = []
+    for name in MARKET_DATA_PROVIDERS:
+        if name not in known:
+            raise ValueError(f'Unknown market data provider: {name}')
+        if name == 'alphavantage' and not alpha_vantage.ENABLED:
+            continue
+        providers.append(known[name]())
+    return providers
+
+
+providers = _configured_providers()
+
+executor = ThreadPoolExecutor(max_workers=MARKET_DATA_WORKERS, thread_name_prefix='market-data')
+
+
+def route(method):
+    """Providers able to serve method, best first.
+
+    Healthy providers are ordered by measured cost per successful call; the
+    configured order breaks ties, so until a fallback has been measured
+    (which happens when it answers a hedge) the home provider stays first.
+    Providers with an open circuit are skipped unless nothing else is left.
+    """
+    capable = [provider for provider in providers if method in provider.methods]
+    healthy = [provider for provider in capable if provider.available()] or capable
+    return sorted(healthy, key=lambda provider: provider.stats.score())
+
+
+def _call(method, *args):
+    candidates = route(method)
+    if not candidates:
+        raise UpstreamError(f'No market data provider supports {method}', status=501)
+    if len(candidates) == 1:
+        return candidates[0].call(method, args)
+
+    # Only interactive requests hedge; background refreshes just fail over
+    hedge_delay = (
+        MARKET_DATA_HEDGE_DELAY
+        if MARKET_DATA_HEDGING and current_priority() == INTERACTIVE else None
+    )
+    home = providers[0]
+
+    def submit(provider):
+        # Borrowed quota is never waited for: a fallback without a free token fails at once
+        queue_timeout = None if provider is home else 0
+        context = contextvars.copy_context()
+        future = executor.submit(context.run, provider.call, method, args, queue_timeout)
+        future.provider = provider
+        return future
+
+    remaining = list(candidates)
+    pending = {submit(remaining.pop(0))}
+    hedged = False
+    error = None
+    while pending:
+        done, pending = wait(
+            pending,
+            timeout=hedge_delay if remaining else None,
+            return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            try:
+                result = future.result()
+            except UpstreamError as e:
+                error = e
+                continue
+            if hedged:
+                metrics.hedged_requests.inc(method=method, winner=future.provider.name)
+            # Slower calls still in flight finish in the background; their timing is still recorded
+            return result
+        if remaining:
+            # Either the budget ran out (hedge) or every call so far failed (fail over)
+            hedged = hedged or not done
+            pending.add(submit(remaining.pop(0)))
+
+    if hedged:
+        metrics.hedged_requests.inc(method=method, winner='none')
+    raise error
+
+
+def quote(symbol):
+    """Finnhub-shaped /quote body from the best available provider"""
+    return _call('quote', symbol)
+
+
+def candles(symbol, resolution, from_ts, to_ts):
+    """Finnhub-shaped /stock/candle body from the best available provider"""
+    return _call('candles', symbol, resolution, from_ts, to_ts)
+
+
+def search(query):
+    """Finnhub-shaped /search body from the best available provider"""
+    return _call('search', query)
+
+
+def symbols(exchange='US'):
+    """Finnhub-shaped /stock/symbol body from the best available provider"""
+    return _call('symbols', exchange)
+
@@ -0,0 +1,314 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Response, g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics of this process rendered in the Prometheus text format.
+
+    Under gunicorn each worker process keeps its own registry, so a scrape
+    reports only the worker that answered it.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Add a callable returning exposition lines, evaluated at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                logger.exception('Metrics collector failed')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status')
+))
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request', ('route', 'method')
+))
+http_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', 'Requests currently being handled'
+))
+http_in_flight.set(0)
+handled_exceptions = registry.register(Counter(
+    'app_handled_exceptions_total', 'Exceptions caught by routes and turned into error responses',
+    ('route', 'exception')
+))
+upstream_requests = registry.register(Counter(
+    'upstream_requests_total', 'Market data API calls by endpoint and HTTP status', ('endpoint', 'status')
+))
+upstream_duration = registry.register(Histogram(
+    'upstream_request_duration_seconds', 'Market data API call latency', ('endpoint',)
+))
+upstream_rejections = registry.register(Counter(
+    'upstream_rejections_total', 'Market data calls refused locally before being sent', ('endpoint', 'reason')
+))
+provider_requests = registry.register(Counter(
+    'market_data_provider_requests_total', 'Calls routed to each market data provider', ('provider', 'method', 'outcome')
+))
+provider_latency = registry.register(Gauge(
+    'market_data_provider_latency_seconds', 'Moving average latency used to rank providers', ('provider',)
+))
+hedged_requests = registry.register(Counter(
+    'market_data_hedged_requests_total', 'Calls that fired a second provider, by the provider that answered',
+    ('method', 'winner')
+))
+db_queries = registry.register(Histogram(
+    'http_request_db_queries', 'Database queries issued per request', ('route',), buckets=QUERY_COUNT_BUCKETS
+))
+db_duration = registry.register(Histogram(
+    'http_request_db_seconds', 'Database time per request', ('route',)
+))
+
+# name -> (cache, {result label: counter attribute})
+_caches = {}
+
+
+def register_cache(name, cache, results=None):
+    """Expose a cache's hit/miss counters as cache_requests_total{cache, result}.
+
+    The counters are plain attributes read at scrape time, so lookups on the
+    cache itself do no extra work.
+    """
+    _caches[name] = (cache, results or {'hit': 'hits', 'miss': 'misses'})
+
+
+def _collect_caches():
+    if not _caches:
+        return []
+    requests_lines = [
+        '# HELP cache_requests_total Cache lookups by cache and result',
+        '# TYPE cache_requests_total counter'
+    ]
+    entries_lines = [
+        '# HELP cache_entries Entries currently held by a cache',
+        '# TYPE cache_entries gauge'
+    ]
+    for name, (cache, results) in sorted(_caches.items()):
+        for result, attr in results.items():
+            labels = _format_labels(('cache', 'result'), (name, result))
+            requests_lines.append(f"cache_requests_total{labels} {getattr(cache, attr)}")
+        entries_lines.append(f"cache_entries{_format_labels(('cache',), (name,))} {len(cache)}")
+    return requests_lines + entries_lines
+
+
+registry.add_collector(_collect_caches)
+
+
+# Per-request database counters; None outside of a request
+_request_db = ContextVar('request_db', default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_db.get()
+    if stats is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_db.get()
+    started = conn.info.get('query_started')
+    if stats is not None and started:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started.pop()
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def init_app(app, db, profiling_enabled=False):
+    """Install request timing, DB query accounting, profiling and /metrics"""
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_token = _request_db.set([0, 0.0])
+        http_in_flight.inc()
+        if profiling_enabled and request.args.get('profile') == '1':
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        g.metrics_status = response.status_code
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            return _profile_response(profiler)
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        route = _route_label()
+        http_in_flight.dec()
+        http_request_duration.observe(time.perf_counter() - started, route=route, method=request.method)
+        http_requests.inc(
+            route=route, method=request.method,
+            status=g.pop('metrics_status', 500 if exc is not None else 200)
+        )
+        token = g.pop('metrics_db_token', None)
+        if token is not None:
+            queries, seconds = _request_db.get()
+            _request_db.reset(token)
+            db_queries.observe(queries, route=route)
+            db_duration.observe(seconds, route=route)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _profile_response(profiler):
+    """Render the request's cProfile stats as plain text, slowest cumulative first"""
+    sort = request.args.get('profile_sort', 'cumulative')
+    limit = request.args.get('profile_limit', 50, type=int)
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    try:
+        stats.sort_stats(sort)
+    except KeyError:
+        stats.sort_stats('cumulative')
+    stats.print_stats(limit)
+    logger.info('Profile for %s %s\n%s', request.method, request.full_path, out.getvalue())
+    return Response(out.getvalue(), mimetype='text/plain')
+
+
+def record_exception(error):
+    """Count an exception a route caught and converted into an error response"""
+    handled_exceptions.inc(route=_route_label(), exception=type(error).__name__)
+    logger.error('Error handling %s', _route_label(), exc_info=error)
@@ -0,0 +1,47 @@
+from urllib.parse import urlencode
+from flask import jsonify, request
+
+# Page sizes for keyset-paginated list endpoints; without ?limit= or ?cursor=
+# the full list is returned, as existing clients expect
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def parse_page_args():
+    """Read ?limit= and ?cursor= and return (limit, cursor, error); limit is None when neither is given"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return None, None, None
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    cursor = request.args.get('cursor', type=int)
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return None, None, f'limit must be between 1 and {MAX_PAGE_SIZE}'
+    return limit, cursor, None
+
+
+def keyset_page(query, id_column, limit, cursor=None):
+    """Return (rows, next_cursor) for the page of query after id cursor.
+
+    Rows are ordered by id and filtered with ``id > cursor``, so each page
+    is an index range scan instead of an OFFSET that re-reads earlier rows.
+    A limit of None returns every row in one page.
+    """
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    if limit is None:
+        return query.order_by(id_column).all(), None
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def page_response(items, next_cursor):
+    """JSON list response with the next cursor in X-Next-Cursor and a Link header"""
+    response = jsonify(items)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
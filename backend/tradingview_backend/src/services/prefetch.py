@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from src.models.stock import Alert, WatchlistItem, db
+from src.routes.alert import evaluate_prices
+from src.routes.stock import fetch_quote, quote_cache, quote_executor, quote_hub
+from src.services import candle_store
+from src.services.resilience import background_priority
+
+logger = logging.getLogger(__name__)
+
+
+def collect_symbols():
+    """Return watched and alerted symbols, most watched first"""
+    counts = {}
+    watchers = db.session.execute(
+        select(WatchlistItem.stock_symbol, func.count())
+        .group_by(WatchlistItem.stock_symbol)
+    ).all()
+    alerted = db.session.execute(
+        select(Alert.stock_symbol, func.count())
+        .where(Alert.status == 'active')
+        .group_by(Alert.stock_symbol)
+    ).all()
+    for symbol, count in watchers + alerted:
+        counts[symbol] = counts.get(symbol, 0) + count
+
+    return sorted(counts, key=lambda symbol: (-counts[symbol], symbol))
+
+
+class PrefetchScheduler:
+    """Background thread that keeps quotes and candles warm for watched symbols.
+
+    Every ``interval`` seconds it refreshes quotes for the most watched symbols
+    and then recent daily candles, spending at most ``max_calls`` upstream
+    requests per cycle. ``candle_share`` of that budget is kept for candles,
+    which rotate through every watched symbol over successive cycles. Each
+    batch of fresh quotes is also run through the alert index so alerts fire
+    without a client posting prices.
+    """
+
+    def __init__(self, app, interval=60.0, max_calls=30, candle_days=365, candle_share=0.25):
+        self.app = app
+        self.interval = interval
+        self.max_calls = max_calls
+        self.candle_days = candle_days
+        self.candle_share = candle_share
+        self._candle_offset = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('Prefetch cycle failed')
+            self._stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def run_once(self):
+        with self.app.app_context(), background_priority():
+            symbols = collect_symbols()
+            candle_calls = min(int(self.max_calls * self.candle_share), self.max_calls)
+            quote_symbols = symbols[:self.max_calls - candle_calls]
+            # Quote calls left unused (few symbols) go to candles as well
+            candle_symbols = self._next_candle_symbols(symbols, self.max_calls - len(quote_symbols))
+
+            prices = {}
+            for symbol, quote in zip(quote_symbols, quote_executor.map(self._safe_fetch(fetch_quote), quote_symbols)):
+                if quote is None:
+                    continue
+                quote_cache.set(symbol, quote)
+                quote_hub.publish(symbol, quote)
+                prices[symbol] = quote['price']
+
+            if prices:
+                evaluate_prices(prices)
+
+            to_timestamp = int(datetime.now().timestamp())
+            from_timestamp = int((datetime.now() - timedelta(days=self.candle_days)).timestamp())
+            for symbol in candle_symbols:
+                try:
+                    candle_store.get_candles(symbol, 'D', from_timestamp, to_timestamp)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Prefetching candles for %s failed', symbol)
+
+    def _next_candle_symbols(self, symbols, count):
+        """Take the next count symbols round-robin, continuing where the last cycle stopped"""
+        if count >= len(symbols):
+            return symbols
+        start = self._candle_offset % len(symbols)
+        self._candle_offset = start + count
+        return (symbols[start:] + symbols[:start])[:count]
+
+    @staticmethod
+    def _safe_fetch(fetch):
+        def wrapped(symbol):
+            try:
+                # Pool threads do not inherit the caller's priority context
+                with background_priority():
+                    return fetch(symbol)
+            except Exception:
+                logger.exception('Prefetching quote for %s failed', symbol)
+                return None
+        return wrapped
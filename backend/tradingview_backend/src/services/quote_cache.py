@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ('value', 'fetched_at')
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class _Flight:
+    """An upstream fetch in progress that other callers can wait on"""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QuoteCache:
+    """In-process TTL cache for quotes with LRU eviction and request coalescing.
+
+    Entries younger than ``ttl`` are served directly. Entries older than that
+    but still within ``stale_ttl`` are served immediately while a background
+    refresh is started (stale-while-revalidate). Concurrent misses for the
+    same key share a single call to the loader.
+    """
+
+    def __init__(self, ttl=15.0, stale_ttl=120.0, max_size=1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader(key) on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        flight = self._inflight[key] = _Flight()
+                        threading.Thread(
+                            target=self._refresh, args=(key, loader, flight), daemon=True
+                        ).start()
+                    return entry.value
+
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if leader:
+            return self._load(key, loader, flight)
+
+        flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key):
+        """Return the last stored value for key regardless of age, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def set(self, key, value):
+        """Store a freshly fetched value for key"""
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, value):
+        self._entries[key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key, loader, flight):
+        try:
+            value = loader(key)
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            return value
+        finally:
+            with self._lock:
+                # Misses (None) are not cached so a bad symbol is retried
+                if flight.error is None and flight.value is not None:
+                    self._store(key, flight.value)
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _refresh(self, key, loader, flight):
+        try:
+            self._load(key, loader, flight)
+        except Exception:
+            # Keep serving the stale value; the next miss will retry
+            pass
@@ -0,0 +1,105 @@
+import threading
+
+
+class Subscription:
+    """A client's view of the hub: the latest undelivered quote per symbol.
+
+    Updates are coalesced, so a slow reader only ever sees the newest quote
+    for each symbol and memory stays bounded by the number of symbols.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self._pending = {}
+        self._cond = threading.Condition()
+
+    def push(self, symbol, quote):
+        with self._cond:
+            self._pending[symbol] = quote
+            self._cond.notify()
+
+    def next(self, timeout=None):
+        """Wait up to timeout seconds and return {symbol: quote} (maybe empty)"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            updates, self._pending = self._pending, {}
+            return updates
+
+
+class _Poller:
+    def __init__(self, hub, symbol):
+        self.hub = hub
+        self.symbol = symbol
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, name=f'quote-stream-{symbol}', daemon=True
+        )
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                quote = self.hub.source(self.symbol)
+            except Exception:
+                quote = None
+            if quote is not None:
+                self.hub.publish(self.symbol, quote)
+            self.stopped.wait(self.hub.interval)
+
+
+class QuoteHub:
+    """Push quote updates to many subscribers from one poller per symbol.
+
+    Pollers are reference counted by subscription: the first subscriber to a
+    symbol starts its poller and the last one to leave stops it, so upstream
+    cost is fixed per distinct watched symbol rather than per client.
+    ``source`` is any callable mapping a symbol to a quote dict or None.
+    """
+
+    def __init__(self, source, interval=5.0):
+        self.source = source
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._pollers = {}
+        self._latest = {}
+
+    def subscribe(self, symbols):
+        subscription = Subscription(symbols)
+        with self._lock:
+            for symbol in subscription.symbols:
+                self._subscribers.setdefault(symbol, set()).add(subscription)
+                if symbol in self._latest:
+                    subscription.push(symbol, self._latest[symbol])
+                if symbol not in self._pollers:
+                    poller = self._pollers[symbol] = _Poller(self, symbol)
+                    poller.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for symbol in subscription.symbols:
+                subscribers = self._subscribers.get(symbol)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+                    self._latest.pop(symbol, None)
+                    poller = self._pollers.pop(symbol, None)
+                    if poller is not None:
+                        poller.stopped.set()
+
+    def publish(self, symbol, quote):
+        """Deliver a quote to every subscriber of symbol if it changed"""
+        with self._lock:
+            if self._latest.get(symbol) == quote or symbol not in self._subscribers:
+                return
+            self._latest[symbol] = quote
+            subscribers = list(self._subscribers[symbol])
+        for subscription in subscribers:
+            subscription.push(symbol, quote)
+
+    def watched_symbols(self):
+        with self._lock:
+            return {symbol: len(subs) for symbol, subs in self._subscribers.items()}
@@ -0,0 +1,139 @@
+import numpy as np
+
+DAY = 86400
+WEEK = 7 * DAY
+
+# Target intervals and the stored resolution each one is read from
+RESAMPLE_BASE = {
+    '5m': '5',
+    '15m': '15',
+    '1h': '60',
+    '1d': 'D',
+    '1w': 'D',
+    '1M': 'D'
+}
+
+# Intervals the provider serves directly; only the rest are built by resample()
+NATIVE_INTERVALS = ('5m', '15m', '1h', '1d')
+
+# Spellings the frontend already sends
+INTERVAL_ALIASES = {
+    'daily': '1d',
+    'weekly': '1w',
+    'monthly': '1M'
+}
+
+_FIXED_WIDTH = {'5m': 300, '15m': 900, '1h': 3600, '1d': DAY}
+
+
+def normalize_interval(interval):
+    """Map an interval or alias to a key of RESAMPLE_BASE, or None if unknown"""
+    interval = INTERVAL_ALIASES.get(interval, interval)
+    return interval if interval in RESAMPLE_BASE else None
+
+
+def bucket_starts(t, interval):
+    """Start timestamp (UTC) of the bucket each bar in t falls into"""
+    if interval in _FIXED_WIDTH:
+        width = _FIXED_WIDTH[interval]
+        return t - t % width
+    if interval == '1w':
+        # The epoch was a Thursday; shift by three days so weeks start on Monday
+        return (t + 3 * DAY) // WEEK * WEEK - 3 * DAY
+    months = t.astype('datetime64[s]').astype('datetime64[M]')
+    return months.astype('datetime64[s]').astype(np.int64)
+
+
+def to_arrays(data):
+    return {
+        't': np.asarray(data['t'], dtype=np.int64),
+        'o': np.asarray(data['o'], dtype=np.float64),
+        'h': np.asarray(data['h'], dtype=np.float64),
+        'l': np.asarray(data['l'], dtype=np.float64),
+        'c': np.asarray(data['c'], dtype=np.float64),
+        'v': np.asarray(data['v'], dtype=np.float64)
+    }
+
+
+def to_lists(arrays):
+    return {key: column.tolist() for key, column in arrays.items()}
+
+
+def resample(arrays, interval):
+    """Aggregate ascending OHLCV bars into coarser buckets.
+
+    Open is the first bar's open, close the last bar's close, high/low the
+    extremes and volume the sum, computed with ufunc.reduceat over the run
+    boundaries of the bucket key rather than per-bar Python.
+    """
+    t = arrays['t']
+    if len(t) == 0:
+        return arrays
+
+    keys = bucket_starts(t, interval)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+
+    return {
+        't': keys[starts],
+        'o': arrays['o'][starts],
+        'h': np.maximum.reduceat(arrays['h'], starts),
+        'l': np.minimum.reduceat(arrays['l'], starts),
+        'c': arrays['c'][ends],
+        'v': np.add.reduceat(arrays['v'], starts)
+    }
+
+
+def lttb_indices(x, y, max_points):
+    """Indices chosen by largest-triangle-three-buckets downsampling.
+
+    The first and last points are always kept. Bucket edges and the
+    next-bucket averages are computed up front with NumPy; the remaining
+    loop only does one vectorized area/argmax per output point.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    edges = (np.arange(max_points - 1) * ((n - 2) / (max_points - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The point after the final bucket is the last sample itself
+    avg_x = np.r_[avg_x[1:], x[-1]]
+    avg_y = np.r_[avg_y[1:], y[-1]]
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs(
+            (x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(arrays, max_points):
+    """Keep at most max_points bars, choosing them by LTTB on the close"""
+    indices = lttb_indices(arrays['t'], arrays['c'], max_points)
+    if len(indices) == len(arrays['t']):
+        return arrays
+    return {key: column[indices] for key, column in arrays.items()}
+
+
+def shape_candles(data, interval=None, max_points=None):
+    """Resample and/or downsample t/o/h/l/c/v columns, returning arrays"""
+    arrays = to_arrays(data)
+    if interval is not None and interval not in NATIVE_INTERVALS:
+        arrays = resample(arrays, interval)
+    if max_points is not None:
+        arrays = downsample(arrays, max_points)
+    return arrays
@@ -0,0 +1,155 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Request priorities: lower values are served first by TokenBucket
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority = contextvars.ContextVar('upstream_priority', default=INTERACTIVE)
+
+
+class UpstreamError(Exception):
+    """A market data provider could not be reached or returned an error"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = None
+
+
+class RateLimitedError(UpstreamError):
+    """A provider (or our own limiter) refused the call for quota reasons"""
+
+
+class CircuitOpenError(UpstreamError):
+    """A provider is considered unhealthy and calls are failing fast"""
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextmanager
+def background_priority():
+    """Run upstream calls in this block behind interactive requests"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose waiters are served in priority order.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    Callers queue on a heap keyed by (priority, arrival), so an interactive
+    request that arrives while background refreshes are waiting takes the
+    next token ahead of them.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Take one token, waiting up to timeout seconds. Returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    self._refill()
+                    at_head = self._waiters[0] == ticket
+                    if at_head and self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+
+                    wait = (1 - self._tokens) / self.rate if at_head else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single trial call
+    is let through (half-open); its success closes the circuit again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial slot for a call that never reached upstream"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
@@ -0,0 +1,234 @@
+import math
+import threading
+import time
+import warnings
+from collections import OrderedDict
+import numpy as np
+
+# Trading days per period, for daily bars
+TRADING_DAYS_PER_YEAR = 252
+RETURN_PERIODS = {
+    'return_1d': 1,
+    'return_1w': 5,
+    'return_1m': 21,
+    'return_3m': 63,
+    'return_1y': 252
+}
+VOLATILITY_PERIODS = {
+    'volatility_1m': 21,
+    'volatility_3m': 63
+}
+# Volume spike: latest volume against the mean of the bars before it
+VOLUME_AVERAGE_BARS = 20
+HIGH_WINDOW_BARS = 252
+
+METRICS = (
+    ('close', 'bars')
+    + tuple(RETURN_PERIODS)
+    + tuple(VOLATILITY_PERIODS)
+    + ('volume_spike', 'high_52w', 'from_52w_high')
+)
+
+
+def align(symbols, series):
+    """Stack {symbol: t/h/c/v arrays} into (t, close, high, volume) matrices.
+
+    Rows follow symbols and columns are the union of all bar timestamps;
+    a symbol without a bar at some timestamp holds NaN there.
+    """
+    present = [symbol for symbol in symbols if symbol in series]
+    if present:
+        t = np.unique(np.concatenate([series[symbol]['t'] for symbol in present]))
+    else:
+        t = np.empty(0, dtype=np.int64)
+
+    shape = (len(symbols), len(t))
+    close = np.full(shape, np.nan)
+    high = np.full(shape, np.nan)
+    volume = np.full(shape, np.nan)
+    for row, symbol in enumerate(symbols):
+        bars = series.get(symbol)
+        if bars is None:
+            continue
+        columns = np.searchsorted(t, bars['t'])
+        close[row, columns] = bars['c']
+        high[row, columns] = bars['h']
+        volume[row, columns] = bars['v']
+    return t, close, high, volume
+
+
+def forward_fill(matrix):
+    """Carry each row's last value over NaN gaps; leading NaNs stay"""
+    columns = np.arange(matrix.shape[1])
+    index = np.where(~np.isnan(matrix), columns, 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return matrix[np.arange(matrix.shape[0])[:, None], index]
+
+
+def log_returns(close):
+    """Bar-to-bar log returns; NaN unless both bars exist"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.diff(np.log(close), axis=1)
+
+
+def _lookback(filled, bars):
+    """Return over the last `bars` columns, NaN when the history is too short"""
+    if filled.shape[1] <= bars:
+        return np.full(filled.shape[0], np.nan)
+    return filled[:, -1] / filled[:, -1 - bars] - 1
+
+
+class Universe:
+    """Aligned candles for one set of symbols and every metric derived from them.
+
+    Metrics are computed once for all symbols with whole-matrix NumPy
+    operations; the correlation matrix is computed on first use.
+    """
+
+    def __init__(self, symbols, series):
+        self.symbols = list(symbols)
+        self.t, close, high, volume = align(self.symbols, series)
+        self.missing = [symbol for symbol in self.symbols if symbol not in series]
+        self.returns = log_returns(close)
+        self.metrics = self._compute_metrics(close, high, volume)
+        self._correlation = None
+        self._correlation_lock = threading.Lock()
+
+    def _compute_metrics(self, close, high, volume):
+        filled = forward_fill(close)
+        count = len(self.symbols)
+        if close.shape[1] == 0:
+            metrics = {name: np.full(count, np.nan) for name in METRICS}
+            metrics['bars'] = np.zeros(count)
+            return metrics
+
+        metrics = {
+            'close': filled[:, -1],
+            'bars': np.sum(~np.isnan(close), axis=1).astype(float)
+        }
+        for name, bars in RETURN_PERIODS.items():
+            metrics[name] = _lookback(filled, bars)
+
+        # All-NaN rows (symbols without data) are expected to give NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for name, bars in VOLATILITY_PERIODS.items():
+                window = self.returns[:, -bars:]
+                std = np.nanstd(window, axis=1, ddof=1)
+                enough = np.sum(~np.isnan(window), axis=1) >= max(2, bars // 2)
+                metrics[name] = np.where(enough, std * math.sqrt(TRADING_DAYS_PER_YEAR), np.nan)
+
+            average = np.nanmean(volume[:, -1 - VOLUME_AVERAGE_BARS:-1], axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                metrics['volume_spike'] = np.where(average > 0, volume[:, -1] / average, np.nan)
+
+            high_52w = np.nanmax(high[:, -HIGH_WINDOW_BARS:], axis=1)
+            metrics['high_52w'] = high_52w
+            metrics['from_52w_high'] = metrics['close'] / high_52w - 1
+        return metrics
+
+    def correlation(self, min_overlap):
+        """Pearson correlation of log returns over the bars each pair shares.
+
+        Pairwise-complete statistics come from a handful of matrix products
+        (valid-bar masks times zero-filled returns) instead of a loop over
+        pairs. Pairs sharing fewer than min_overlap returns are NaN.
+        """
+        with self._correlation_lock:
+            if self._correlation is None:
+                self._correlation = self._pairwise_correlation()
+        corr, overlap = self._correlation
+        return np.where(overlap >= min_overlap, corr, np.nan)
+
+    def _pairwise_correlation(self):
+        valid = ~np.isnan(self.returns)
+        mask = valid.astype(np.float64)
+        x = np.where(valid, self.returns, 0.0)
+
+        n = mask @ mask.T
+        sum_x = x @ mask.T              # sum of row i's returns where row j is also valid
+        sum_xx = (x * x) @ mask.T
+        sum_xy = x @ x.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = n * sum_xy - sum_x * sum_x.T
+            variance = n * sum_xx - sum_x ** 2
+            corr = covariance / np.sqrt(variance * variance.T)
+        np.clip(corr, -1.0, 1.0, out=corr)
+        return corr, n
+
+    def screen(self, filters=None, sort=None, limit=None):
+        """Rows of symbol metrics passing {metric: {min, max}} filters, ordered by sort ('-metric' descends)"""
+        keep = np.ones(len(self.symbols), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for name, bounds in (filters or {}).items():
+                values = self.metrics[name]
+                if bounds.get('min') is not None:
+                    keep &= values >= bounds['min']
+                if bounds.get('max') is not None:
+                    keep &= values <= bounds['max']
+        rows = np.flatnonzero(keep)
+
+        if sort:
+            values = self.metrics[sort.lstrip('-')][rows]
+            # NaN sorts last either way
+            key = -values if sort.startswith('-') else values
+            rows = rows[np.argsort(np.where(np.isnan(key), np.inf, key), kind='stable')]
+        if limit is not None:
+            rows = rows[:limit]
+
+        # NaN (not enough history) is not valid JSON, so send null
+        columns = {
+            name: [None if v != v else v for v in values[rows].tolist()]
+            for name, values in self.metrics.items()
+        }
+        columns['bars'] = [int(v) for v in columns['bars']]
+        return [
+            {'symbol': self.symbols[row], **{name: column[i] for name, column in columns.items()}}
+            for i, row in enumerate(rows.tolist())
+        ]
+
+
+class _Entry:
+    __slots__ = ('universe', 'built_at')
+
+    def __init__(self, universe, built_at):
+        self.universe = universe
+        self.built_at = built_at
+
+
+class UniverseCache:
+    """LRU of built universes keyed by (symbols, window, date), each kept for up to ttl seconds.
+
+    The key's date rolls the cache over each day; the TTL picks up the
+    still-forming latest bar within a day.
+    """
+
+    def __init__(self, ttl=300.0, max_size=32):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        """Return (universe, cached) for key, calling build() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.built_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.universe, True
+            self.misses += 1
+
+        universe = build()
+        with self._lock:
+            self._entries[key] = _Entry(universe, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return universe, False
@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from flask import Response, request
+
+try:
+    import brotli  # Optional: pip install brotli to also serve br variants
+except ImportError:
+    brotli = None
+
+# Vite emits content-hashed bundles here, so their URLs never change content
+IMMUTABLE_PREFIX = 'assets/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Everything else (index.html, favicon) is revalidated with its ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+    'image/x-icon',
+    'image/vnd.microsoft.icon',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain'
+}
+MIN_COMPRESS_SIZE = 1024
+
+
+class StaticAsset:
+    __slots__ = ('path', 'mimetype', 'etag', 'bodies', 'immutable')
+
+    def __init__(self, path, mimetype, etag, bodies, immutable):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.bodies = bodies
+        self.immutable = immutable
+
+
+class StaticManifest:
+    """Every file under the static folder, read and compressed once at startup.
+
+    Requests are answered from memory by relative path, so serving the SPA
+    does no filesystem lookups, and gzip/brotli variants are produced once
+    instead of per response. Restart (or call load()) after a frontend build.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        if root and os.path.isdir(root):
+            self.load()
+
+    def load(self):
+        assets = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full_path = os.path.join(directory, filename)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                with open(full_path, 'rb') as f:
+                    assets[path] = self._build(path, f.read())
+        self.assets = assets
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def __len__(self):
+        return len(self.assets)
+
+    @staticmethod
+    def _build(path, content):
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        bodies = {'identity': content}
+        if mimetype in COMPRESSIBLE_TYPES and len(content) >= MIN_COMPRESS_SIZE:
+            variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(content, quality=11)
+            # Only keep variants that actually save bytes
+            bodies.update((name, body) for name, body in variants.items() if len(body) < len(content))
+        return StaticAsset(
+            path,
+            mimetype,
+            hashlib.sha256(content).hexdigest()[:20],
+            bodies,
+            path.startswith(IMMUTABLE_PREFIX)
+        )
+
+
+def _negotiate(asset):
+    """Pick the smallest variant the client accepts"""
+    accepted = [
+        encoding for encoding in asset.bodies
+        if encoding != 'identity' and request.accept_encodings.quality(encoding) > 0
+    ]
+    if not accepted:
+        return 'identity'
+    return min(accepted, key=lambda encoding: len(asset.bodies[encoding]))
+
+
+def serve_static(manifest, path):
+    """Serve path from the manifest, falling back to index.html for SPA routes"""
+    asset = manifest.get(path) if path else None
+    if asset is None:
+        if path.startswith(IMMUTABLE_PREFIX):
+            # A missing bundle must not be answered with HTML that gets cached
+            return "Not found", 404
+        asset = manifest.get('index.html')
+        if asset is None:
+            return "index.html not found", 404
+
+    encoding = _negotiate(asset)
+    response = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if len(asset.bodies) > 1:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+    response.headers['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL
+    )
+    # Answers If-None-Match with a bodiless 304
+    return response.make_conditional(request)
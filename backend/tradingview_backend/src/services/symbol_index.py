@@ -0,0 +1,232 @@
+import csv
+import logging
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Minimum share of the query's trigrams an entry must contain to match fuzzily
+FUZZY_THRESHOLD = 0.5
+
+_WORD = re.compile(r"[A-Z0-9]+")
+
+
+def read_symbols_csv(path):
+    """Read (symbol, name, type) tuples from a symbol,name,type CSV file"""
+    with open(path, newline='') as f:
+        return [(row['symbol'], row['name'], row.get('type', '')) for row in csv.DictReader(f)]
+
+
+def write_symbols_csv(path, entries):
+    """Atomically write (symbol, name, type) tuples as a symbol,name,type CSV file"""
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('symbol', 'name', 'type'))
+        writer.writerows(entries)
+    os.replace(partial, path)
+
+
+def _trigrams(text):
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """In-memory autocomplete index over ticker symbols and company names.
+
+    Results are ranked exact ticker, ticker prefix, company-name word prefix,
+    then fuzzy trigram matches. Prefix lookups are bisects over sorted lists,
+    so a typical keystroke is answered without scanning the universe.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._by_symbol = {}
+        self._tickers = []
+        self._words = []
+        self._grams = {}
+        self.add(entries)
+
+    @classmethod
+    def from_csv(cls, path):
+        """Build an index from a symbol,name,type CSV file"""
+        return cls(read_symbols_csv(path))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entries):
+        """Add (symbol, name, type) entries that are not indexed yet"""
+        with self._lock:
+            for symbol, name, kind in entries:
+                symbol = symbol.strip().upper()
+                if not symbol:
+                    continue
+                name = (name or '').strip()
+                if symbol in self._by_symbol:
+                    # Keep the first name we saw; it is only used for display
+                    continue
+                position = len(self._entries)
+                self._entries.append((symbol, name, kind or ''))
+                self._by_symbol[symbol] = position
+                insort(self._tickers, (symbol, position))
+                for word in set(_WORD.findall(name.upper())):
+                    insort(self._words, (word, position))
+                for gram in _trigrams(symbol) | _trigrams(name):
+                    self._grams.setdefault(gram, []).append(position)
+
+    def replace(self, entries):
+        """Swap in a freshly loaded universe"""
+        fresh = SymbolIndex(entries)
+        with self._lock:
+            self._entries = fresh._entries
+            self._by_symbol = fresh._by_symbol
+            self._tickers = fresh._tickers
+            self._words = fresh._words
+            self._grams = fresh._grams
+
+    def search(self, query, limit=10, fuzzy=True):
+        """Return up to limit {'symbol', 'name', 'type'} matches, best first.
+
+        With fuzzy=False only exact and prefix matches are returned.
+        """
+        query = query.strip().upper()
+        if not query:
+            return []
+
+        seen = set()
+        ranked = []
+
+        def take(positions):
+            for position in positions:
+                if position not in seen and len(ranked) < limit:
+                    seen.add(position)
+                    ranked.append(position)
+
+        with self._lock:
+            if query in self._by_symbol:
+                take([self._by_symbol[query]])
+
+            take(sorted(
+                self._prefix(self._tickers, query),
+                key=lambda position: (len(self._entries[position][0]), self._entries[position][0])
+            ))
+            take(sorted(
+                self._prefix(self._words, query),
+                key=lambda position: self._entries[position][0]
+            ))
+
+            if fuzzy and len(ranked) < limit:
+                take(self._fuzzy(query))
+
+            return [
+                {'symbol': symbol, 'name': name, 'type': kind}
+                for symbol, name, kind in (self._entries[position] for position in ranked)
+            ]
+
+    @staticmethod
+    def _prefix(keys, query, cap=200):
+        start = bisect_left(keys, (query, -1))
+        positions = []
+        for key, position in keys[start:start + cap]:
+            if not key.startswith(query):
+                break
+            positions.append(position)
+        return positions
+
+    def _fuzzy(self, query):
+        grams = _trigrams(query)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+
+        # Share of the query's trigrams found in the ticker or name
+        needed = max(1, math.ceil(FUZZY_THRESHOLD * len(grams)))
+        scored = sorted(
+            (-shared, len(self._entries[position][1]), self._entries[position][0], position)
+            for position, shared in counts.items()
+            if shared >= needed
+        )
+        return [position for _, _, _, position in scored]
+
+
+class SymbolRefresher:
+    """Background thread that periodically reloads the symbol universe.
+
+    Without a shared_file each process fetches the universe itself. With one,
+    only the process with ``fetching`` set (the elected leader) calls the
+    loader, at most once per interval, and writes the result there; every
+    process reloads its index whenever that file changes.
+    """
+
+    # How often processes look for a newer shared file (seconds)
+    CHECK_INTERVAL = 60.0
+
+    def __init__(self, index, loader, interval, shared_file=None):
+        self.index = index
+        self.loader = loader
+        self.interval = interval
+        self.shared_file = shared_file
+        self.fetching = shared_file is None
+        self._loaded_mtime = None
+        self._refresh_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='symbol-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Refreshing the symbol universe failed')
+            if self.shared_file is None:
+                self._stopped.wait(self.interval)
+            else:
+                self._stopped.wait(min(self.interval, self.CHECK_INTERVAL))
+
+    def lead(self):
+        """Become the process that fetches the universe, refreshing right away"""
+        self.fetching = True
+        self.refresh()
+
+    def refresh(self):
+        with self._refresh_lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self.shared_file is None:
+            entries = self.loader()
+            if entries:
+                self.index.replace(entries)
+            return
+
+        mtime = self._shared_mtime()
+        if self.fetching and (mtime is None or time.time() - mtime >= self.interval):
+            entries = self.loader()
+            if entries:
+                write_symbols_csv(self.shared_file, entries)
+                mtime = self._shared_mtime()
+        if mtime is not None and mtime != self._loaded_mtime:
+            self.index.replace(read_symbols_csv(self.shared_file))
+            self._loaded_mtime = mtime
+
+    def _shared_mtime(self):
+        try:
+            return os.stat(self.shared_file).st_mtime
+        except FileNotFoundError:
+            return None
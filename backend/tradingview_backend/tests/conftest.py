@@ -0,0 +1,24 @@
+import os
+import tempfile
+import pytest
+
+# Keep the app off the committed database; route tests patch the candle store out
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradingview-tests.db')}")
+
+
+@pytest.fixture
+def client():
+    from src.main import app
+    return app.test_client()
+
+
+@pytest.fixture
+def database():
+    """Empty tables in the test database, inside an app context"""
+    from src.main import app
+    from src.models.stock import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield db
+        db.session.remove()
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.mark.parametrize('sort', [5, ['close'], {'close': 1}, 'spread'])
+def test_screener_rejects_bad_sort(client, sort):
+    response = client.post('/api/screener', json={'symbols': ['AAPL'], 'sort': sort})
+
+    assert response.status_code == 400
+    assert 'sort must be one of' in response.get_json()['error']
@@ -0,0 +1,22 @@
+import numpy as np
+from src.services import backtest
+
+
+def bars(closes):
+    return {'c': np.array(closes, dtype=np.float64), 't': np.arange(len(closes))}
+
+
+def test_alert_rules_fire_at_the_target_like_an_alert():
+    closes = bars([199, 200, 199, 198, 199])
+    above = backtest.compile_rule({'type': 'price_above', 'value': 200})
+    below = backtest.compile_rule({'type': 'price_below', 'value': 198})
+
+    assert backtest.rising_edges(backtest.evaluate(above, closes)).tolist() == [1]
+    assert backtest.rising_edges(backtest.evaluate(below, closes)).tolist() == [3]
+
+
+def test_generic_comparisons_stay_strict():
+    closes = bars([199, 200, 199])
+    rule = backtest.compile_rule({'type': 'above', 'left': 'close', 'right': 200})
+
+    assert not backtest.evaluate(rule, closes).any()
@@ -0,0 +1,56 @@
+from src.models.stock import Alert, CandleRange, ChangeLog
+from src.services import bulk
+
+DAY = bulk.DAY
+MONDAY = 1_700_438_400  # 2023-11-20 00:00 UTC
+
+
+def candle_rows(*timestamps, symbol='AAPL'):
+    return [
+        {'symbol': symbol, 'resolution': 'D', 'timestamp': ts,
+         'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 100}
+        for ts in timestamps
+    ]
+
+
+def held(db, symbol='AAPL'):
+    candle_range = db.session.get(CandleRange, (symbol, 'D'))
+    return candle_range and (candle_range.start_ts, candle_range.end_ts)
+
+
+def test_spans_bridge_weekends_but_not_longer_gaps():
+    days = [MONDAY + i * DAY for i in (0, 1, 2, 3, 4, 7, 8, 30, 31)]
+
+    assert bulk._merge_spans([[ts, ts] for ts in reversed(days)], DAY * 4) == [
+        [days[0], days[6]], [days[7], days[8]]
+    ]
+
+
+def test_new_series_is_held_from_its_newest_span_only(database):
+    bulk.import_candles(candle_rows(MONDAY, MONDAY + DAY, MONDAY + 60 * DAY, MONDAY + 61 * DAY))
+
+    assert held(database) == (MONDAY + 60 * DAY, MONDAY + 61 * DAY)
+
+
+def test_held_range_only_takes_spans_that_touch_it(database):
+    database.session.add(CandleRange(symbol='AAPL', resolution='D', start_ts=MONDAY, end_ts=MONDAY + 10 * DAY))
+    database.session.commit()
+
+    bulk.import_candles(candle_rows(
+        MONDAY - 40 * DAY,  # far before the range
+        MONDAY + 12 * DAY, MONDAY + 14 * DAY,  # continues it across a weekend
+        MONDAY + 50 * DAY  # far after it
+    ))
+
+    assert held(database) == (MONDAY, MONDAY + 14 * DAY)
+
+
+def test_imported_alerts_each_get_one_change_log_entry(database, monkeypatch):
+    monkeypatch.setattr(bulk, 'BULK_CHUNK_SIZE', 2)
+    rows = [{'stock_symbol': 'AAPL', 'alert_type': 'price_above', 'target_value': i} for i in range(5)]
+    bulk.import_alerts(rows)
+    bulk.import_alerts(rows)
+
+    alert_ids = sorted(alert.id for alert in database.session.query(Alert))
+    assert len(alert_ids) == 10
+    assert sorted(entry.entity_id for entry in database.session.query(ChangeLog)) == alert_ids
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from src.services.indicators import INDICATORS, IndicatorCache
+
+
+def candles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    t = 1_600_000_000 + 86400 * np.arange(count, dtype=np.int64)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    return t, close
+
+
+def full(name, t, close):
+    _, params = INDICATORS[name]
+    return IndicatorCache().compute('key', name, params, t, close)
+
+
+def assert_same(actual, expected):
+    actual_t, actual_values = actual
+    expected_t, expected_values = expected
+    np.testing.assert_array_equal(actual_t, expected_t)
+    assert actual_values.keys() == expected_values.keys()
+    for output in expected_values:
+        np.testing.assert_allclose(actual_values[output], expected_values[output], rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize('name', list(INDICATORS))
+def test_incremental_matches_full_recompute(name):
+    _, params = INDICATORS[name]
+    t, close = candles(400)
+    cache = IndicatorCache()
+
+    forming = close[:300].copy()
+    forming[-1] *= 1.01  # the newest bar was still forming on the first request
+    cache.compute('key', name, params, t[:300], forming)
+    result = cache.compute('key', name, params, t[:320], close[:320])
+
+    assert cache.hits == 1
+    assert_same(result, full(name, t[:320], close[:320]))
+
+
+@pytest.mark.parametrize('name', list(INDICATORS))
+def test_sliding_window_matches_full_recompute_and_stays_bounded(name):
+    _, params = INDICATORS[name]
+    t, close = candles(400)
+    cache = IndicatorCache()
+
+    for start in range(0, 100, 10):
+        window = slice(start, start + 300)
+        result = cache.compute('key', name, params, t[window], close[window])
+        assert_same(result, full(name, t[window], close[window]))
+
+    entry = cache._entries['key']
+    assert len(entry.t) == 300
+    assert all(len(values) == 300 for values in entry.values.values())
+
+
+@pytest.fixture
+def intraday(monkeypatch):
+    """Serve stored 5-minute bars to the indicators route at a settable wall clock"""
+    from datetime import datetime
+    from src.routes import stock
+    from src.services import candle_store
+
+    t = 1_700_000_000 - 1_700_000_000 % 86400 + 300 * np.arange(2000, dtype=np.int64)
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.002, len(t))))
+    clock = {'now': int(t[600])}
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock['now'], tz)
+
+    def get_candles(symbol, resolution, from_ts, to_ts):
+        window = (t >= from_ts) & (t <= to_ts)
+        return {'t': t[window], 'c': close[window]}
+
+    monkeypatch.setattr(stock, 'datetime', Clock)
+    monkeypatch.setattr(stock, 'indicator_cache', IndicatorCache())
+    monkeypatch.setattr(candle_store, 'get_candles', get_candles)
+    return clock, get_candles
+
+
+@pytest.mark.parametrize('name', list(INDICATORS))
+def test_sliding_intraday_requests_hit_the_cache(client, intraday, name):
+    from src.routes import stock
+    clock, get_candles = intraday
+
+    url = f'/api/stocks/indicators/AAPL?indicator={name}&resolution=5&days=1'
+    client.get(url)
+    for _ in range(5):
+        clock['now'] += 300
+        body = client.get(url).get_json()
+
+    assert stock.indicator_cache.hits == 5
+    assert body['t'][0] % 86400 == 0
+    bars = get_candles('AAPL', '5', body['t'][0], clock['now'])
+    expected_t, expected_values = full(name, bars['t'], bars['c'])
+    assert body['t'] == expected_t.tolist()
+    for output, values in expected_values.items():
+        actual = np.array([np.nan if v is None else v for v in body['values'][output]])
+        np.testing.assert_allclose(actual, values, rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize('days', [0, -5])
+def test_non_positive_days_is_rejected(client, days):
+    response = client.get(f'/api/stocks/indicators/AAPL?days={days}')
+
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from src.services import candle_store, resample
+
+
+def day_bars(days):
+    t = 1_700_000_000 - 1_700_000_000 % resample.DAY + resample.DAY * np.arange(days, dtype=np.int64)
+    close = np.linspace(100, 110, days)
+    return {'t': t, 'o': close, 'h': close + 1, 'l': close - 1, 'c': close, 'v': np.full(days, 1000.0)}
+
+
+@pytest.fixture
+def requested(monkeypatch):
+    calls = []
+
+    def get_candles(symbol, resolution, from_ts, to_ts):
+        calls.append(resolution)
+        return day_bars(30)
+
+    monkeypatch.setattr(candle_store, 'get_candles', get_candles)
+    return calls
+
+
+@pytest.mark.parametrize('route', ['historical', 'intraday'])
+@pytest.mark.parametrize('interval, resolution', [
+    ('5m', '5'),
+    ('15m', '15'),
+    ('1h', '60'),
+    ('1d', 'D'),
+    ('1w', 'D'),
+    ('1M', 'D'),
+    ('weekly', 'D')
+])
+def test_interval_reads_its_base_resolution(client, requested, route, interval, resolution):
+    response = client.get(f'/api/stocks/{route}/AAPL?interval={interval}&format=columnar')
+
+    assert response.status_code == 200
+    assert requested == [resolution]
+    assert response.get_json()['resolution'] == resample.normalize_interval(interval)
+
+
+def test_native_intervals_are_not_resampled():
+    data = day_bars(30)
+
+    for interval in resample.NATIVE_INTERVALS:
+        assert resample.shape_candles(data, interval)['t'].tolist() == data['t'].tolist()
+    assert len(resample.shape_candles(data, '1w')['t']) < len(data['t'])
@@ -52,7 +52,9 @@ const Alerts = ({ currentSymbol }) => {
           target_value: ''
         });
         setShowNewAlertForm(false);
-        fetchAlerts();
+        // The response is the new alert; no need to refetch the whole list
+        const created = await response.json();
+        setAlerts(prev => [...prev, created]);
       }
     } catch (err) {
       console.error('Error creating alert:', err);
@@ -66,7 +68,7 @@ const Alerts = ({ currentSymbol }) => {
       });
 
       if (response.ok) {
-        fetchAlerts();
+        setAlerts(prev => prev.filter(alert => alert.id !== alertId));
       }
     } catch (err) {
       console.error('Error deleting alert:', err);
@@ -84,7 +86,8 @@ const Alerts = ({ currentSymbol }) => {
       });
 
       if (response.ok) {
-        fetchAlerts();
+        const updated = await response.json();
+        setAlerts(prev => prev.map(alert => (alert.id === updated.id ? updated : alert)));
       }
     } catch (err) {
       console.error('Error updating alert:', err);
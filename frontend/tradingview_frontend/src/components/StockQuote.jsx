@@ -31,9 +31,24 @@ const StockQuote = ({ symbol }) => {
   useEffect(() => {
     if (symbol) {
       fetchQuote(symbol);
-      // Set up auto-refresh every 30 seconds
-      const interval = setInterval(() => fetchQuote(symbol), 30000);
-      return () => clearInterval(interval);
+      // Subscribe to pushed quote updates instead of polling
+      const source = new EventSource(`/api/stocks/stream?symbols=${encodeURIComponent(symbol)}`);
+      source.addEventListener('quote', (event) => {
+        setQuote(JSON.parse(event.data));
+        setError(null);
+      });
+      // A refused stream (the server is at its stream limit) is not retried
+      // by the browser, so fall back to the old 30 second refresh
+      let interval = null;
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && interval === null) {
+          interval = setInterval(() => fetchQuote(symbol), 30000);
+        }
+      };
+      return () => {
+        source.close();
+        if (interval !== null) clearInterval(interval);
+      };
     }
   }, [symbol]);
 
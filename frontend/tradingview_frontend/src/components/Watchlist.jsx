@@ -44,9 +44,14 @@ const Watchlist = ({ onSymbolSelect, currentSymbol }) => {
       });
 
       if (response.ok) {
+        // The response is the new watchlist; no need to refetch the whole list
+        const created = await response.json();
+        setWatchlists(prev => [...prev, created]);
+        if (!selectedWatchlist) {
+          setSelectedWatchlist(created);
+        }
         setNewWatchlistName('');
         setShowNewWatchlistForm(false);
-        fetchWatchlists();
       }
     } catch (err) {
       console.error('Error creating watchlist:', err);
@@ -68,7 +73,10 @@ const Watchlist = ({ onSymbolSelect, currentSymbol }) => {
       });
 
       if (response.ok) {
-        fetchWatchlists();
+        const item = await response.json();
+        setWatchlists(prev => prev.map(w => (
+          w.id === item.watchlist_id ? { ...w, items: [...w.items, item] } : w
+        )));
       }
     } catch (err) {
       console.error('Error adding to watchlist:', err);
@@ -84,7 +92,10 @@ const Watchlist = ({ onSymbolSelect, currentSymbol }) => {
       });
 
       if (response.ok) {
-        fetchWatchlists();
+        const watchlistId = selectedWatchlist.id;
+        setWatchlists(prev => prev.map(w => (
+          w.id === watchlistId ? { ...w, items: w.items.filter(item => item.id !== itemId) } : w
+        )));
       }
     } catch (err) {
       console.error('Error removing from watchlist:', err);
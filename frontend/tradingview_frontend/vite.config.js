@@ -11,6 +11,13 @@ export default defineConfig({
       "@": path.resolve(__dirname, "./src"),
     },
   },
+  // Flask serves the SPA from the backend's static folder (read once at
+  // startup), so `pnpm run build` writes there: rebuild and restart the
+  // backend after any change under src/, or it keeps serving the old bundle.
+  build: {
+    outDir: path.resolve(__dirname, "../../backend/tradingview_backend/src/static"),
+    emptyOutDir: true,
+  },
   server: {
     proxy: {
       '/api': {